@@ -1,49 +1,8 @@
-import paramiko
-import os
-import re
+import sys
 
-from config import FROM_PATH, TO_PATH, HOST, PORT, USERNAME, PASSWORD, FOLDERS, KV_REMOTE_PATH, RV_REMOTE_PATH
+from kvrv.fetch import hent
 
-# Forbindelse til FTP-server
-transport = paramiko.Transport((HOST, PORT))
-transport.connect(username=USERNAME, password=PASSWORD)
-sftp = paramiko.SFTPClient.from_transport(transport)
-
-# Funktioner til download af filer og mapper
-def download_files(sftp, remote_dir, local_dir, folder_name):
-    files = sftp.listdir(remote_dir+"/"+folder_name)
-
-    for file in files:   # download each file
-        new_file = re.sub(r'-\d{12}(?=\.)', '', file)
-        remote_file_path = remote_dir + "/" + folder_name + "/" + file
-        local_file_path = os.path.join(local_dir, folder_name, new_file)
-        os.makedirs(os.path.dirname(local_file_path), exist_ok=True)
-        try:
-            sftp.get(remote_file_path, local_file_path)
-        except Exception as e:
-            print(f"Failed to download {remote_file_path}: {e}")
-
-def download_folders(folders):
-    for folder in folders:
-        download_files(sftp, remote_path, local_path, folder)
-
-# Download RV25 data
-remote_path = RV_REMOTE_PATH
-local_path = FROM_PATH + "rv"
-folders = FOLDERS
-print("Trying to download:", remote_path)
-download_folders(folders)
-print("Downloaded RV25 data.")
-
-
-# Download KV25 data
-remote_path = KV_REMOTE_PATH
-local_path = FROM_PATH + "kv"
-folders = FOLDERS
-print("Trying to download:", remote_path)
-download_folders(folders)
-print("Downloaded KV25 data.")
-
-# Luk forbindelsen
-sftp.close()
-transport.close()
\ No newline at end of file
+# Hent nye og ændrede filer for KV25 og RV25 fra SFTP-serveren (se kvrv/fetch.py).
+# Kør med --fuld for at hente alle filer uanset manifestet
+if __name__ == "__main__":
+    hent(fuld="--fuld" in sys.argv[1:])
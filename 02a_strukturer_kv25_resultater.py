@@ -1,105 +1,9 @@
-import pandas as pd
-import os
-import glob
-import json
-import datetime
-from pathlib import Path
+import argparse
 
-from helper_functions import kombiner_resultater
-from config import FROM_PATH, TO_PATH, FOLDERS
+from kvrv.structure import strukturer_resultater
 
-# KV25 - Valgresultater
-def get_kv_resultater(from_path=FROM_PATH, to_path=TO_PATH, folders=FOLDERS, *_unused):
-    files = kombiner_resultater(from_path, to_path, "kv", folders[0])
-    partier, kandidater = [], []
-
-    for file in files:
-        try:
-            with open(file, encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception as e:
-            print(f"Error reading {file}: {e}")
-            continue
-        
-        # define base structure for each entry (what columns do we want in the data)
-        base = {
-            "kommune": data.get("Kommune"),
-            "kommune_kode": data.get("Kommunekode"),
-            "afstemningsområde": data.get("Afstemningsområde"),
-            "afstemningsområde_dagi_id": data.get("AfstemningsområdeDagiId"),
-            "frigivelsestidspunkt": data.get("FrigivelsesTidspunktUTC"),
-            "godkendelsestidspunkt": data.get("GodkendelsesTidspunktUTC"),
-            "resultat_art": data.get("Resultatart"),
-            "total_gyldige_stemmer": data.get("GyldigeStemmer"),
-            "total_afgivne_stemmer": data.get("AfgivneStemmer"),
-        }
-
-        # if there are no results, add a placeholder entry
-        if data.get("Resultatart") == "IngenResultater":
-            partier.append({
-                **base, "parti": None, "stemmer": 0, "listestemmer": 0,
-                "difference_forrige_valg": 0
-            })
-            continue
-        
-        # if there are results present, iterate through parties and candidates
-        for parti in data.get("Kandidatlister", []):
-            partier.append({
-                **base,
-                "parti": parti.get("Navn"),
-                "parti_id": parti.get("KandidatlisteId"),
-                "parti_bogstav": parti.get("Bogstavbetegnelse"),
-                "stemmer": parti.get("Stemmer", 0),
-                "listestemmer": parti.get("Listestemmer", 0),
-                "difference_forrige_valg": parti.get("StemmerDifferenceFraForrigeValg", 0),
-            })
-
-            for kandidat in (parti.get("Kandidater") or []):
-                kandidater.append({
-                    **base,
-                    "kandidat": kandidat.get("Stemmeseddelnavn"),
-                    'kandidat_id': kandidat.get("Id"),
-                    "parti": parti.get("Navn"),
-                    "parti_id": parti.get("KandidatlisteId"),
-                    "parti_bogstav": parti.get("Bogstavbetegnelse"),
-                    "stemmer": kandidat.get("Stemmer", 0),
-                })
-
-    return partier, kandidater
-
-kv_partier, kv_kandidater = get_kv_resultater(FROM_PATH, TO_PATH, FOLDERS, "kv",)
-
-df_kv_partier = pd.DataFrame(kv_partier)
-df_kv_kandidater = pd.DataFrame(kv_kandidater)
-
-# Convert datetime columns (dd-mm-yyyy hh:mm:ss), coercing invalid/missing values
-for df in (df_kv_partier, df_kv_kandidater):
-    for col in ("frigivelsestidspunkt", "godkendelsestidspunkt"):
-        if col in df:
-            df[col] = pd.to_datetime(df[col], format="%d-%m-%Y %H:%M:%S", errors="coerce")
-
-if df_kv_partier.empty:
-    # save an empty dataframe with the correct columns
-    df_kv_partier = pd.DataFrame(columns=[
-        "kommune", "kommune_kode", "afstemningsområde", "afstemningsområde_dagi_id",
-        "frigivelsestidspunkt", "godkendelsestidspunkt", "resultat_art",
-        "total_gyldige_stemmer", "total_afgivne_stemmer",
-        "parti", "parti_id", "parti_bogstav", "stemmer", "listestemmer",
-        "difference_forrige_valg"
-    ])
-
-outdir = Path(TO_PATH) / "kv"
-outdir.mkdir(parents=True, exist_ok=True)
-df_kv_partier.to_csv(outdir / "kv25_resultater_partier.csv", index=False)
-
-# check if df_kv_kandidater is not empty before saving
-if df_kv_kandidater.empty:
-    # save an empty dataframe with the correct columns
-    df_kv_kandidater = pd.DataFrame(columns=[
-        "kommune", "kommune_kode", "afstemningsområde", "afstemningsområde_dagi_id",
-        "frigivelsestidspunkt", "godkendelsestidspunkt", "resultat_art",
-        "total_gyldige_stemmer", "total_afgivne_stemmer",
-        "kandidat", "kandidat_id", "parti", "parti_id", "parti_bogstav", "stemmer"
-    ])
-
-df_kv_kandidater.to_csv(outdir / "kv25_resultater_kandidater.csv", index=False)
\ No newline at end of file
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Strukturer valgresultaterne for KV25")
+    parser.add_argument("--workers", type=int, default=1, help="antal processer til at parse json-filerne (1 = serielt)")
+    args = parser.parse_args()
+    strukturer_resultater("kv", workers=args.workers)
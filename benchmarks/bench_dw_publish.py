@@ -0,0 +1,103 @@
+"""Benchmark publishing charts through DatawrapperClient against the old serial loop.
+
+Starts a local mock of the Datawrapper API that answers every publish after a fixed
+latency and answers every n-th request with 429 + Retry-After. The old loop (one
+requests.post per chart, no session) is compared with DatawrapperClient.publish_many
+for every chart id in dw_charts.json. Run from the repository root:
+
+    python benchmarks/bench_dw_publish.py [--latency 0.15] [--throttle-every 50]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dw_client import DatawrapperClient
+
+
+class MockDatawrapper(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latency = 0.15
+    throttle_every = 50
+    lock = threading.Lock()
+    requests_seen = 0
+    published = set()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        with self.lock:
+            MockDatawrapper.requests_seen += 1
+            throttle = self.throttle_every and self.requests_seen % self.throttle_every == 0
+        time.sleep(self.latency)
+        if throttle:
+            self.send_json(429, {"message": "Too many requests"}, {"Retry-After": "1"})
+            return
+        chart_id = self.path.split("/")[-2]
+        with self.lock:
+            MockDatawrapper.published.add(chart_id)
+        self.send_json(200, {"id": chart_id})
+
+    def send_json(self, status, body, headers=None):
+        raw = json.dumps(body).encode()
+        self.send_response(status)
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def log_message(self, *args):
+        pass
+
+
+# Den gamle løkke fra publish_dw_charts.py: ét requests.post ad gangen, ingen session og ingen retries
+def gammel_publish(base_url, chart_ids):
+    failed = 0
+    for chart_id in chart_ids:
+        response = requests.post(f"{base_url}/charts/{chart_id}/publish", json={"callWebhooks": True},
+                                 headers={"Authorization": "Bearer x", "accept": "*/*", "content-type": "application/json"})
+        failed += not response.ok
+    return failed
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.15, help="svartid per kald i mock-serveren (sekunder)")
+    parser.add_argument("--throttle-every", type=int, default=50, help="svar 429 på hvert n'te kald (0 = aldrig)")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--rate", type=float, default=50.0)
+    args = parser.parse_args()
+
+    MockDatawrapper.latency = args.latency
+    MockDatawrapper.throttle_every = args.throttle_every
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockDatawrapper)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_port}/v3"
+
+    with open("dw_charts.json", encoding="utf-8") as f:
+        dw_charts = json.load(f)
+    chart_ids = [v["id"] for chart in dw_charts.values() for v in chart.values() if isinstance(v, dict) and "id" in v]
+    print(f"{len(chart_ids)} charts, {args.latency * 1000:.0f} ms latency, 429 on every {args.throttle_every}th request")
+
+    start = time.perf_counter()
+    failed = gammel_publish(base_url, chart_ids)
+    print(f"serial requests.post:  {time.perf_counter() - start:6.1f}s, {failed} failed (429s are not retried)")
+
+    MockDatawrapper.published.clear()
+    start = time.perf_counter()
+    with DatawrapperClient("x", base_url=base_url, workers=args.workers, rate=args.rate, burst=args.workers) as client:
+        results = client.publish_many(chart_ids)
+    failed = sum(result is not True for result in results.values())
+    print(f"DatawrapperClient:     {time.perf_counter() - start:6.1f}s, {failed} failed, "
+          f"{len(MockDatawrapper.published)} published ({args.workers} workers, {args.rate:g} req/s)")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
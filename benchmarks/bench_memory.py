@@ -0,0 +1,45 @@
+"""Memory report for the result tables: plain read_csv against the schema in kvrv/skema.py.
+
+For every structured result table (KV and RV, parties and candidates) this prints
+memory_usage(deep=True) of the table as pandas infers it from the CSV, and of the
+same table with the schema applied, per column for the largest table. Run from
+the repository root after 02a/02b:
+
+    python benchmarks/bench_memory.py
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import TO_PATH
+from kvrv.skema import anvend_skema
+
+TABELLER = [f"{valg}/{valg}25_resultater_{tabel}.csv" for valg in ("kv", "rv") for tabel in ("partier", "kandidater")]
+
+def mb(n):
+    return f"{n / 1e6:8.1f} MB"
+
+def main():
+    før_i_alt = efter_i_alt = 0
+    største = None
+    for tabel in TABELLER:
+        før = pd.read_csv(os.path.join(TO_PATH, tabel)).drop_duplicates().reset_index(drop=True)
+        efter = anvend_skema(før.copy())
+        før_mem, efter_mem = før.memory_usage(deep=True), efter.memory_usage(deep=True)
+        før_i_alt += før_mem.sum()
+        efter_i_alt += efter_mem.sum()
+        print(f"{tabel:40} {len(før):>8} rows {mb(før_mem.sum())} -> {mb(efter_mem.sum())} ({efter_mem.sum() / før_mem.sum():.0%})")
+        if største is None or før_mem.sum() > største[1].sum():
+            største = (tabel, før_mem, efter_mem, før.dtypes, efter.dtypes)
+    print(f"{'KV+RV':40} {'':>13} {mb(før_i_alt)} -> {mb(efter_i_alt)} ({efter_i_alt / før_i_alt:.0%})")
+
+    tabel, før_mem, efter_mem, før_typer, efter_typer = største
+    print(f"\nPer column, {tabel}:")
+    for kolonne in før_typer.index:
+        print(f"  {kolonne:28} {str(før_typer[kolonne]):>10} {mb(før_mem[kolonne])} -> {str(efter_typer[kolonne]):>19} {mb(efter_mem[kolonne])}")
+
+if __name__ == "__main__":
+    main()
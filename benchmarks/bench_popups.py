@@ -0,0 +1,88 @@
+"""Benchmark the vectorised add_popups against the old row-wise implementation.
+
+Runs both over every afstemningssteder/*.csv file for kv and rv (plus the two
+national files), checks that the pop_up columns are identical, and reports the
+total time spent in each. Run from the repository root:
+
+    python benchmarks/bench_popups.py
+"""
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generate_pop_ups import (
+    add_popups, largest_party_colors, party_colors, default_color, non_party_columns,
+    kv_path, rv_path, kv_valgsted_path, rv_valgsted_path,
+)
+
+
+# Den gamle implementering med df.apply(make_popup, axis=1)
+def gammel_add_popups(df):
+    df = df.copy()
+    if "kommune" in df.columns:
+        geo = "kommune"
+    elif "afstemningssted_navn" in df.columns:
+        geo = "afstemningssted_navn"
+    else:
+        geo = "region"
+    party_columns = [c for c in df.columns if c not in non_party_columns]
+    df[party_columns] = df[party_columns].apply(pd.to_numeric, errors="coerce")
+
+    def make_popup(row):
+        largest = row["største_parti"]
+        valg = row[geo]
+        valg = f"på valgstedet {valg}" if geo == "afstemningssted_navn" else f"i {valg}"
+        header_color = largest_party_colors.get(largest, default_color)
+        header = (
+            f"<b style='color:{header_color}; font-size:1.5em;margin-bottom: 10px'>{largest}</b><br> "
+            f"blev størst {valg}<br>"
+        )
+        rows = []
+        for party in party_columns:
+            pct = row[party]
+            if pd.isna(pct):
+                continue
+            pct = float(pct)
+            color = party_colors.get(party, default_color)
+            label_span = (
+                f"<span style='display:inline-block; width:30px; font-size:1em;"
+                f"vertical-align:middle; margin-left: 4px'>{party}</span>"
+            )
+            bar_span = (
+                f"<span style='display:inline-block; "
+                f"width:0.3em; height:1.2em; vertical-align:middle;"
+                f"background:{color};'></span>"
+            )
+            pct_span = (
+                f"<span style='display:inline-block; width:50px; "
+                f"text-align:left; font-size:1em; vertical-align:middle'>{pct:.1f}%</span>"
+            )
+            rows.append((pct, bar_span + label_span + pct_span))
+        rows.sort(key=lambda x: x[0], reverse=True)
+        return header + "<br>".join(line for _, line in rows)
+
+    df["pop_up"] = df.apply(make_popup, axis=1)
+    return df
+
+if __name__ == "__main__":
+    files = [kv_path, rv_path]
+    for path in (kv_valgsted_path, rv_valgsted_path):
+        files += sorted(glob.glob(os.path.join(path, "*.csv")))
+    frames = [pd.read_csv(file, sep=";") for file in files]
+    rows = sum(len(df) for df in frames)
+    print(f"{len(frames)} files, {rows} rows")
+
+    tider = {}
+    for navn, funktion in (("row-wise apply", gammel_add_popups), ("vectorised", add_popups)):
+        start = time.perf_counter()
+        resultater = [funktion(df)["pop_up"] for df in frames]
+        tider[navn] = (time.perf_counter() - start, resultater)
+        print(f"  {navn:<15} {tider[navn][0]:6.2f} s")
+
+    ens = all(a.equals(b) for a, b in zip(tider["row-wise apply"][1], tider["vectorised"][1]))
+    print("identical output:", ens)
@@ -0,0 +1,89 @@
+"""Benchmark the columnar result builder against the old list-of-dicts builder.
+
+Parses every valgresultater file under data/raw/{kv,rv} with both builders and
+reports wall time and peak traced memory (tracemalloc) for building the party and
+candidate DataFrames. Run from the repository root:
+
+    python benchmarks/bench_resultat_builder.py
+"""
+import gc
+import glob
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import FROM_PATH, FOLDERS
+from helper_functions import parse_valgresultat, byg_resultat_tabeller
+
+
+# Den gamle måde: én dict per række, med base-felterne kopieret ind i hver række
+def gammel_parse(data):
+    base = {
+        "kommune": data.get("Kommune"),
+        "kommune_kode": data.get("Kommunekode"),
+        "afstemningsområde": data.get("Afstemningsområde"),
+        "afstemningsområde_dagi_id": data.get("AfstemningsområdeDagiId"),
+        "frigivelsestidspunkt": data.get("FrigivelsesTidspunktUTC"),
+        "godkendelsestidspunkt": data.get("GodkendelsesTidspunktUTC"),
+        "resultat_art": data.get("Resultatart"),
+        "total_gyldige_stemmer": data.get("GyldigeStemmer"),
+        "total_afgivne_stemmer": data.get("AfgivneStemmer"),
+    }
+    partier, kandidater = [], []
+    if data.get("Resultatart") == "IngenResultater":
+        partier.append({**base, "parti": None, "stemmer": 0, "listestemmer": 0, "difference_forrige_valg": 0})
+        return partier, kandidater
+    for parti in data.get("Kandidatlister", []):
+        partier.append({
+            **base, "parti": parti.get("Navn"), "parti_id": parti.get("KandidatlisteId"),
+            "parti_bogstav": parti.get("Bogstavbetegnelse"), "stemmer": parti.get("Stemmer", 0),
+            "listestemmer": parti.get("Listestemmer", 0),
+            "difference_forrige_valg": parti.get("StemmerDifferenceFraForrigeValg", 0),
+        })
+        for kandidat in (parti.get("Kandidater") or []):
+            kandidater.append({
+                **base, "kandidat": kandidat.get("Stemmeseddelnavn"), "kandidat_id": kandidat.get("Id"),
+                "parti": parti.get("Navn"), "parti_id": parti.get("KandidatlisteId"),
+                "parti_bogstav": parti.get("Bogstavbetegnelse"), "stemmer": kandidat.get("Stemmer", 0),
+            })
+    return partier, kandidater
+
+def gammel(files):
+    partier, kandidater = [], []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            p, k = gammel_parse(json.load(f))
+        partier.extend(p)
+        kandidater.extend(k)
+    return pd.DataFrame(partier), pd.DataFrame(kandidater)
+
+def kolonner(files):
+    chunks = []
+    for file in files:
+        with open(file, encoding="utf-8") as f:
+            chunks.append(parse_valgresultat(json.load(f)))
+    return byg_resultat_tabeller(chunks)
+
+def mål(builder, files):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    df_partier, df_kandidater = builder(files)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, len(df_partier) + len(df_kandidater)
+
+if __name__ == "__main__":
+    for valg in ("kv", "rv"):
+        files = sorted(glob.glob(os.path.join(FROM_PATH, valg, FOLDERS[0], "*.json")))
+        print(f"{valg}: {len(files)} files")
+        for navn, builder in (("list-of-dicts", gammel), ("columnar", kolonner)):
+            elapsed, peak, rows = mål(builder, files)
+            print(f"  {navn:<14} {elapsed:6.2f} s   peak {peak / 2**20:7.1f} MiB   {rows} rows")
@@ -0,0 +1,86 @@
+"""Benchmark the 98-kommune update loop: per-kommune DataFrame.query against partitioned lookups.
+
+Part 1 times only the lookups the loop needs for every kommune (its rows of the
+results, and its 2021 results), done the old way (.query on the full tables for
+each kommune) and the new way (one groupby into a dict, then a dict lookup).
+Part 2 times a whole opdater(KOMMUNER) run against a scratch copy of
+data/struktureret/kv, so the repository's data files are never touched. Run from
+the repository root:
+
+    python benchmarks/bench_update_loop.py [--repeat 5]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from kvrv.refdata import load_refdata
+from kvrv.update import Kommuner, KOMMUNER, load_resultater, opdater
+
+
+def gammel_opslag(partier, resultater_21):
+    # Som det gamle 05a-loop: to fulde scanninger per kommune
+    for kommune_id in partier["kommune_kode"].unique():
+        partier.query("kommune_kode == @kommune_id").copy()
+        resultater_21.query("kommune_id == @kommune_id")
+
+def ny_opslag(partier, resultater_21):
+    per_kommune = dict(tuple(partier.groupby("kommune_kode", sort=False)))
+    per_kommune_21 = dict(tuple(resultater_21.groupby("kommune_id", sort=False)))
+    tom_21 = resultater_21.iloc[:0]
+    for kommune_id in partier["kommune_kode"].unique():
+        per_kommune[kommune_id]
+        per_kommune_21.get(kommune_id, tom_21)
+
+def best_of(fn, repeat):
+    tider = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        tider.append(time.perf_counter() - start)
+    return min(tider)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    partier = load_resultater(KOMMUNER, "partier")
+    resultater_21 = KOMMUNER.load_21()
+    print(f"{partier['kommune_kode'].nunique()} kommuner, {len(partier)} party rows, {len(resultater_21)} rows from 2021")
+
+    gammel = best_of(lambda: gammel_opslag(partier, resultater_21), args.repeat)
+    ny = best_of(lambda: ny_opslag(partier, resultater_21), args.repeat)
+    print(f"lookups, .query per kommune:     {gammel * 1000:7.1f} ms")
+    print(f"lookups, groupby dict partition: {ny * 1000:7.1f} ms ({gammel / ny:.0f}x)")
+
+    # Hele opdateringen på en kopi, uden borgmesterarket (det kræver netværk)
+    refdata = load_refdata()
+    ark = pd.DataFrame(columns=["kommune_kode", "borgmester", "borgmesterparti"])
+    with tempfile.TemporaryDirectory() as tmp:
+        valg_path = Path(tmp) / "kv"
+        shutil.copytree(KOMMUNER.valg_path, valg_path, ignore=shutil.ignore_patterns("kandidat-info", "*.json"))
+        geo = Kommuner(valg_path)
+
+        tider = []
+        stdout = sys.stdout
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            sys.stdout = open(os.devnull, "w")
+            try:
+                opdater(geo, refdata, ark)
+            finally:
+                sys.stdout.close()
+                sys.stdout = stdout
+            tider.append(time.perf_counter() - start)
+    print(f"opdater(KOMMUNER), whole loop:   {min(tider):7.2f} s (best of {args.repeat})")
+
+if __name__ == "__main__":
+    main()
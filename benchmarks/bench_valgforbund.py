@@ -0,0 +1,86 @@
+"""Benchmark the valgforbund lookup and the timestamp parsing in 03a on the kandidat-data of all 98 kommuner.
+
+The old lookup looped over the valgforbund with iterrows and did two boolean scans of
+the whole candidate table per kandidatliste id. It wrote the lists with .at, which
+pandas 3 refuses, so here the same scans collect plain lists instead. The new lookup
+is tilføj_valgforbund_partier (explode + merge). Both must give the same parties.
+Run from the repository root:
+
+    python benchmarks/bench_valgforbund.py [--repeat 5]
+"""
+import argparse
+import datetime
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import FROM_PATH, TO_PATH
+from kvrv.structure import get_kv_kandidatdata, tilføj_valgforbund_partier
+
+def gammel_opslag(df_valgforbund_data, df_kandidat_data):
+    partier, bogstaver = [], []
+    for _, row in df_valgforbund_data.iterrows():
+        if not isinstance(row["kandidatliste_id"], list):
+            partier.append("")
+            bogstaver.append("")
+            continue
+        partier.append([])
+        bogstaver.append([])
+        for id in row["kandidatliste_id"]:
+            if id in df_kandidat_data["kandidatliste_id"].values:
+                bogstaver[-1].append(df_kandidat_data[df_kandidat_data["kandidatliste_id"] == id]["parti_bogstav"].values[0])
+                partier[-1].append(df_kandidat_data[df_kandidat_data["kandidatliste_id"] == id]["parti_navn"].values[0])
+    return df_valgforbund_data.assign(valgforbund_partier=partier, valgforbund_partibogstav=bogstaver)
+
+def gammel_tid(kolonne):
+    def convert_to_datetime(date_str):
+        try:
+            return datetime.datetime.strptime(date_str, "%d-%m-%Y %H:%M:%S")
+        except ValueError:
+            return pd.NaT
+    return kolonne.apply(convert_to_datetime)
+
+def ny_tid(kolonne):
+    return pd.to_datetime(kolonne, format="%d-%m-%Y %H:%M:%S", errors="coerce")
+
+def best_of(fn, repeat):
+    tider = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        tider.append(time.perf_counter() - start)
+    return min(tider)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    kandidat_data, valgforbund_data = get_kv_kandidatdata(FROM_PATH, TO_PATH, "kv", "kandidat-data")
+    df_kandidat_data, df_valgforbund_data = pd.DataFrame(kandidat_data), pd.DataFrame(valgforbund_data)
+    ids = df_valgforbund_data["kandidatliste_id"].str.len().sum()
+    print(f"{df_kandidat_data['kommune'].nunique()} kommuner, {len(df_kandidat_data)} candidates, "
+          f"{len(df_valgforbund_data)} valgforbund with {ids} kandidatliste ids")
+
+    gammel = gammel_opslag(df_valgforbund_data.copy(), df_kandidat_data)
+    ny = tilføj_valgforbund_partier(df_valgforbund_data.copy(), df_kandidat_data)
+    assert gammel.equals(ny), "the two lookups disagree"
+
+    t_gammel = best_of(lambda: gammel_opslag(df_valgforbund_data.copy(), df_kandidat_data), args.repeat)
+    t_ny = best_of(lambda: tilføj_valgforbund_partier(df_valgforbund_data.copy(), df_kandidat_data), args.repeat)
+    print(f"valgforbund, iterrows + scans: {t_gammel * 1000:8.1f} ms")
+    print(f"valgforbund, explode + merge:  {t_ny * 1000:8.1f} ms ({t_gammel / t_ny:.0f}x)")
+
+    tider = pd.concat([df_kandidat_data["frigivelsestidspunkt"], df_kandidat_data["opdateringstidspunkt"]], ignore_index=True)
+    assert gammel_tid(tider).equals(ny_tid(tider)), "the two parsers disagree"
+    t_gammel = best_of(lambda: gammel_tid(tider), args.repeat)
+    t_ny = best_of(lambda: ny_tid(tider), args.repeat)
+    print(f"{len(tider)} timestamps, apply(strptime): {t_gammel * 1000:6.1f} ms")
+    print(f"{len(tider)} timestamps, pd.to_datetime:  {t_ny * 1000:6.1f} ms ({t_gammel / t_ny:.0f}x)")
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
+import os
+
 FROM_PATH = "data/raw/"
 TO_PATH = "data/struktureret/"
 
 KOMMUNE_INFO = "data/kommuner.json"
 PARTIER_INFO = "data/partier.json"
+CACHE_PATH = os.environ.get("KVRV_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "kv_rv_25")) # Parse cache, kept outside the repo so checkout/clean does not wipe it
+REFDATA_CACHE = "refdata.pkl" # Dict indexes over kommuner.json and partier.json (kvrv/refdata.py), stored in CACHE_PATH
 BORGMESTRE = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSyAqdHmvVJX2xvsb0PbIwNcrEOu40HKV6ljA2mnYgpqB-4IbaplSBhCZNFiC6IaGvhNIG_mP6KKrk3/pub?gid=0&single=true&output=csv"
-REGIONS_FPS = "https://docs.google.com/spreadsheets/d/e/2PACX-1vSyAqdHmvVJX2xvsb0PbIwNcrEOu40HKV6ljA2mnYgpqB-4IbaplSBhCZNFiC6IaGvhNIG_mP6KKrk3/pub?gid=774356730&single=true&output=csv" 
+REGIONS_FPS = os.environ.get("REGIONS_FPS", "https://docs.google.com/spreadsheets/d/e/2PACX-1vSyAqdHmvVJX2xvsb0PbIwNcrEOu40HKV6ljA2mnYgpqB-4IbaplSBhCZNFiC6IaGvhNIG_mP6KKrk3/pub?gid=774356730&single=true&output=csv")
+DW_URLS = "https://docs.google.com/spreadsheets/d/e/2PACX-1vRQUadygm9cUwREReC2MSBMsRPSBR42KKwKI_od_qSY65cVLk-ud8xcJhfQ9q_XYfbSJJ64OmyeQEg_/pub?output=csv" # URL sheet: the data file behind every Datawrapper chart
+DW_CHARTS = "dw_charts.json" # Chart ids per geography (kommunekode, region or national)
 
 # SFTP login information
 HOST = "data.valg.dk"
@@ -15,4 +21,27 @@ PASSWORD = "Valg"
 # SFTP paths for KV25 and RV25 data
 KV_REMOTE_PATH = "/data/kommunalvalg-134-18-11-2025" # SFTP path for KV25 data
 RV_REMOTE_PATH = "/data/regionsrådsvalg-134-18-11-2025" # SFTP path for RV25 data
-FOLDERS = ["valgresultater", "mandatfordeling"] # Folders to download for KV25 and RV25 from SFTP server
\ No newline at end of file
+FOLDERS = ["valgresultater", "mandatfordeling"] # Folders to download for KV25 and RV25 from SFTP server
+MANIFEST_FILE = "manifest.json" # Local manifest (per valg) with size, mtime and timestamp of every downloaded file
+HASH_INDEX_FILE = "hash_index.json" # Local index (per valg) of .hash sidecars and sha256 of every downloaded json file
+STATE_FILE = "behandlede_{}.json" # Fingerprints of the raw files a structuring script last processed (per valg and folder)
+OMRAADE_TILSTAND = "tilstand_afstemningsomraader.json" # Latest resultat_art, frigivelsestidspunkt and content hash per afstemningsområde (per valg, kvrv/tilstand.py)
+AENDREDE_FILER = "aendrede_filer.json" # Data files (per valg) rewritten by 05a/05b since the charts were last published
+STREAM_KANDIDATER = os.environ.get("KVRV_STREAM_KANDIDATER", "0") == "1" # 05a/05b fold candidate votes straight from the raw files (kvrv/kandidater.py), and 02a/02b skip the candidate table
+
+# Concurrent SFTP download
+SFTP_WORKERS = 8 # Number of parallel SFTP connections used by 01_hent_data.py
+SFTP_RETRIES = 3 # Retries per file before giving up
+SFTP_BACKOFF = 1.0 # Seconds to wait before the first retry (doubled for each retry)
+
+# Datawrapper API client (dw_client.py)
+DW_API = os.environ.get("DW_API_URL", "https://api.datawrapper.de/v3") # Can point at a local mock server for testing
+DW_WORKERS = 8 # Max concurrent requests (also the size of the connection pool)
+DW_RATE = 10.0 # Average requests per second across all workers
+DW_BURST = 20 # Requests allowed in a burst before the rate limit kicks in
+DW_RETRIES = 5 # Retries on 429, 5xx and connection errors
+DW_BACKOFF = 1.0 # Seconds to wait before the first retry (doubled for each retry) when there is no Retry-After
+
+# Valgnat-daemonen (valgnat.py)
+VALGNAT_INTERVAL = 60 # Seconds between two polls of the SFTP server
+VALGNAT_OPDATER = 300 # Rerun 05a/05b at least this often (seconds), so changes in the Google sheets are picked up
@@ -1,11 +1,13 @@
 import os
 from dotenv import load_dotenv
-import requests
 import pandas as pd
 import json
 import copy
 
-urls = pd.read_csv("https://docs.google.com/spreadsheets/d/e/2PACX-1vRQUadygm9cUwREReC2MSBMsRPSBR42KKwKI_od_qSY65cVLk-ud8xcJhfQ9q_XYfbSJJ64OmyeQEg_/pub?output=csv")
+from config import DW_URLS
+from dw_client import DatawrapperClient
+
+urls = pd.read_csv(DW_URLS)
 
 metadata = json.load(open("dw_design.json", "r", encoding="utf-8"))
 load_dotenv()  # this will load variables from .env into os.environ
@@ -15,13 +17,10 @@ DW_TOKEN = os.getenv("DW_TOKEN")
 if DW_TOKEN is None:
     raise ValueError("DW_TOKEN not found in .env file")
 
+client = DatawrapperClient(DW_TOKEN)
+
 ## DEFINE THE FUNCTIONS TO CREATE THE CHARTS, TABLES AND MAPS
 def create_status_table(geo, data_url):
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": f"Bearer {DW_TOKEN}"
-    }
-
     m = copy.deepcopy(metadata["status-table-metadata"])
 
          # Case 1: File stores full chart JSON: {"chart": {"metadata": {...}}}
@@ -47,21 +46,13 @@ def create_status_table(geo, data_url):
         "externalData": data_url
     }
 
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    if not r.ok:
-        raise RuntimeError(f"Datawrapper error {r.status_code}: {r.text}")
-    return r.json()
+    return client.create_chart(payload)
 
 
 
 def create_tables(geo, data_url):
     print(f"Creating chart for {geo} using data: {data_url}")
 
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": f"Bearer {DW_TOKEN}"
-    }
-
     m = copy.deepcopy(metadata["stemme-table-metadata"]) # Deep copy so we never mutate the original file object
 
     # --- Normalize to the pure metadata block ---
@@ -88,18 +79,11 @@ def create_tables(geo, data_url):
         "externalData": data_url
     }
 
-    r = requests.post(url, headers=headers, json=payload, timeout=60)
-    if not r.ok:
-        raise RuntimeError(f"Datawrapper error {r.status_code}: {r.text}")
-    return r.json()
+    return client.create_chart(payload)
 
 
 def create_columns(geo, data_url):
 
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": f"Bearer {DW_TOKEN}"
-    }
     m = copy.deepcopy(metadata["column-metadata"])
 
     # --- Normalize metadata structure ---
@@ -124,21 +108,13 @@ def create_columns(geo, data_url):
         "externalData": data_url
     }
 
-    response = requests.post(url, headers=headers, json=payload, timeout=60)
-
-    if not response.ok:
-        raise RuntimeError(f"Datawrapper error {response.status_code}: {response.text}")
+    chart = client.create_chart(payload)
 
-    print("Chart created:", response.json().get("id"))
-    return response.json()
+    print("Chart created:", chart.get("id"))
+    return chart
 
 def create_maps(geo, data_url):
 
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": "Bearer " + DW_TOKEN,
-    }
-
     m = copy.deepcopy(metadata["map-metadata"])
     # --- Normalize metadata structure ---
     if isinstance(m, dict) and "chart" in m and "metadata" in m["chart"]:
@@ -162,13 +138,10 @@ def create_maps(geo, data_url):
         "externalData": data_url
     }
 
-    response = requests.post(url, headers=headers, json=payload, timeout=60)
-
-    if not response.ok:
-        raise RuntimeError(f"Datawrapper error {response.status_code}: {response.text}")
+    chart = client.create_chart(payload)
 
-    print("Chart created:", response.json().get("id"))
-    return response.json()
+    print("Chart created:", chart.get("id"))
+    return chart
 
 
 #charts = {}
@@ -0,0 +1,187 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from config import DW_API, DW_WORKERS, DW_RATE, DW_BURST, DW_RETRIES, DW_BACKOFF
+
+# Statuskoder, hvor det giver mening at prøve igen (rate limit og midlertidige serverfejl)
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class DatawrapperFejl(RuntimeError):
+    """A Datawrapper API call failed after all retries."""
+
+    def __init__(self, response):
+        self.response = response
+        super().__init__(f"Datawrapper error {response.status_code}: {response.text}")
+
+
+class TokenBucket:
+    """Thread-safe token bucket: rate requests per second on average, bursts of up to capacity.
+
+    pause() stops every caller until the given time, so one 429 with Retry-After
+    slows down the whole client and not only the thread that got it.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if now >= self.paused_until and self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = max(self.paused_until - now, (1 - self.tokens) / self.rate)
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+def _retry_after(response, default):
+    # Retry-After er enten et antal sekunder eller en http-dato. Datoer bruger vi ikke, så fald tilbage til backoff
+    try:
+        return max(float(response.headers["Retry-After"]), 0.0)
+    except (KeyError, ValueError):
+        return default
+
+
+class DatawrapperClient:
+    """Datawrapper API client with a pooled session, a rate limit and retries.
+
+    All calls share one requests.Session, so connections are reused, and one token bucket.
+    The *_many methods run up to `workers` calls concurrently. base_url can point at a
+    local mock server (DW_API_URL in the environment does the same for the scripts).
+    """
+
+    def __init__(self, token, base_url=DW_API, workers=DW_WORKERS, rate=DW_RATE, burst=DW_BURST,
+                 retries=DW_RETRIES, backoff=DW_BACKOFF, timeout=60):
+        self.base_url = base_url.rstrip("/")
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+
+        self.session = requests.Session()
+        self.session.headers.update({"Authorization": f"Bearer {token}", "accept": "*/*"})
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def request(self, method, path, idempotent=True, **kwargs):
+        """Send one request, retrying 429/5xx, connection errors and timeouts. Raises DatawrapperFejl.
+
+        A request that is not idempotent is only retried when it cannot have been carried
+        out (429, no connection or a connect timeout), so a lost response never makes it happen twice.
+        """
+        retry_status = RETRY_STATUS if idempotent else {429}
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire()
+            wait = self.backoff * 2 ** attempt
+            try:
+                response = self.session.request(method, self.base_url + path, timeout=self.timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                # ConnectTimeout er både en ConnectionError og en Timeout: forbindelsen blev aldrig oprettet
+                if attempt == self.retries or not (idempotent or isinstance(e, requests.ConnectTimeout)):
+                    raise
+                print(f"Retrying {method} {path} in {wait:.1f}s ({e})")
+                time.sleep(wait)
+                continue
+
+            if response.status_code not in retry_status or attempt == self.retries:
+                break
+            wait = _retry_after(response, wait)
+            if response.status_code == 429:
+                self.bucket.pause(wait)
+            print(f"Retrying {method} {path} in {wait:.1f}s (status {response.status_code})")
+            time.sleep(wait)
+
+        if not response.ok:
+            raise DatawrapperFejl(response)
+        return response
+
+    def _map(self, fn, items):
+        # Kør fn for hvert element med højst self.workers kald ad gangen. Returnerer {element: resultat eller fejl}
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = {item: pool.submit(fn, item) for item in items}
+        results = {}
+        for item, future in futures.items():
+            try:
+                results[item] = future.result()
+            except Exception as e:
+                results[item] = e
+        return results
+
+    def find_chart(self, title, folder_id, chart_type=None):
+        """Return the id of a chart with exactly this title (and type, if given) in the folder, or None."""
+        response = self.request("GET", "/charts", params={"folderId": folder_id, "search": title, "limit": 100})
+        for chart in response.json().get("list", []):
+            # Mappe og type tjekkes også her, så fx en tabel og et søjlediagram med samme titel ikke forveksles
+            if (chart.get("title") == title and str(chart.get("folderId")) == str(folder_id)
+                    and (chart_type is None or chart.get("type") == chart_type)):
+                return chart["id"]
+        return None
+
+    def create_chart(self, payload, chart_id=None):
+        """Create a chart, or update it if it already exists, and return the chart as the API does.
+
+        With a known chart_id the chart is patched instead of created. Otherwise an
+        existing chart with the same title and type in payload["folderId"] is reused, so rerunning
+        a script (or retrying a create whose response got lost) does not leave duplicate charts.
+        """
+        folder_id = payload.get("folderId")
+        if chart_id is None and folder_id is not None:
+            chart_id = self.find_chart(payload["title"], folder_id, payload.get("type"))
+        if chart_id is not None:
+            return self.patch_chart(chart_id, payload)
+
+        for attempt in range(self.retries + 1):
+            try:
+                return self.request("POST", "/charts", idempotent=False, json=payload).json()
+            except (requests.ConnectionError, requests.Timeout, DatawrapperFejl) as e:
+                status = getattr(e.response, "status_code", None)
+                if attempt == self.retries or (status is not None and status not in RETRY_STATUS):
+                    raise
+                # svaret gik tabt, eller serveren fejlede undervejs - grafen kan være oprettet alligevel
+                time.sleep(self.backoff * 2 ** attempt)
+                chart_id = self.find_chart(payload["title"], folder_id, payload.get("type")) if folder_id is not None else None
+                if chart_id is not None:
+                    return self.patch_chart(chart_id, payload)
+
+    def patch_chart(self, chart_id, payload):
+        """Set the given chart properties (sending the same payload twice is harmless)."""
+        return self.request("PATCH", f"/charts/{chart_id}", json=payload).json()
+
+    def publish(self, chart_id):
+        """Publish a chart. Publishing an unchanged chart again is harmless."""
+        return self.request("POST", f"/charts/{chart_id}/publish", json={"callWebhooks": True})
+
+    def publish_many(self, chart_ids):
+        """Publish charts concurrently. Returns {chart_id: True, or the exception}."""
+        return {
+            chart_id: True if not isinstance(result, Exception) else result
+            for chart_id, result in self._map(self.publish, list(chart_ids)).items()
+        }
@@ -1,37 +1,16 @@
 import os
 from dotenv import load_dotenv
-import requests
 import pandas as pd
 import json
 
-metadata = json.load(open("dw_design.json", "r", encoding="utf-8"))
-print(metadata["column-metadata"])
-
-load_dotenv()  # this will load variables from .env into os.environ
-
-## LOAD IN THE DW TOKEN
-DW_TOKEN = os.getenv("DW_TOKEN")
-if DW_TOKEN is None:
-    raise ValueError("DW_TOKEN not found in .env file")
-
-## LOAD IN THE DATA AND TOPOJSONS
-kommuner = pd.read_json("data/kommuner.json")
-topojsons = [f for f in os.listdir("data/shapes/") if f.endswith(".topojson")]
-
+from dw_client import DatawrapperClient
 
 ## DEFINE THE FUNCTIONS TO CREATE THE CHARTS, TABLES AND MAPS
-
-for col in ["table_id", "chart_id", "map_id"]:
-    kommuner[col] = kommuner[col].astype("object")
+# metadata og client sættes, når scriptet køres (under if __name__ == "__main__" nederst)
 
 def create_tables(row):
     kommune_name = row['kommune_navn']
 
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": "Bearer " + DW_TOKEN,
-        "Content-Type": "application/json"
-    }
     data = {
         "title": "Sådan stemte " + kommune_name + " Kommune",
         "type": "tables",
@@ -41,17 +20,11 @@ def create_tables(row):
         "externalData": None,
     }
 
-    response = requests.post(url, headers=headers, json=data)
-    return response
+    return client.create_chart(data)
 
 def create_charts(row):
     kommune_name = row['kommune_navn']
 
-    url = "https://api.datawrapper.de/v3/charts"
-    headers = {
-        "Authorization": "Bearer " + DW_TOKEN,
-        "Content-Type": "application/json"
-    }
     data = {
         "title": "Sådan stemte " + kommune_name + " Kommune",
         "type": "column-chart",
@@ -61,8 +34,7 @@ def create_charts(row):
         'externalData': None,
         }
 
-    response = requests.post(url, headers=headers, json=data)
-    return response
+    return client.create_chart(data)
 
 # def create_maps(row):
 #     kommune_name = row['kommune_navn']
@@ -156,27 +128,47 @@ def create_charts(row):
 
 
 
-for index, row in kommuner[:3].iterrows():
-    print("Hi")
-    # create_tables(row)
-    # create_charts(row)
-    # map_response = create_maps(row)
-    # map_id = map_response.json()['id']
-    # row['map_id'] = map_id
-    # kommuner.at[index, 'map_id'] = map_id  # Save to DataFrame
-    # add_topojson_to_map(row, map_id)
+if __name__ == "__main__":
+    metadata = json.load(open("dw_design.json", "r", encoding="utf-8"))
+    print(metadata["column-metadata"])
 
+    load_dotenv()  # this will load variables from .env into os.environ
 
-    # url = f"https://api.datawrapper.de/v3/charts/{map_id}"
-    # headers = {
-    #     "Authorization": f"Bearer {DW_TOKEN}"
-    # }
+    ## LOAD IN THE DW TOKEN
+    DW_TOKEN = os.getenv("DW_TOKEN")
+    if DW_TOKEN is None:
+        raise ValueError("DW_TOKEN not found in .env file")
+
+    client = DatawrapperClient(DW_TOKEN)
+
+    ## LOAD IN THE DATA AND TOPOJSONS
+    kommuner = pd.read_json("data/kommuner.json")
+    topojsons = [f for f in os.listdir("data/shapes/") if f.endswith(".topojson")]
+
+    for col in ["table_id", "chart_id", "map_id"]:
+        kommuner[col] = kommuner[col].astype("object")
+
+    for index, row in kommuner[:3].iterrows():
+        print("Hi")
+        # create_tables(row)
+        # create_charts(row)
+        # map_response = create_maps(row)
+        # map_id = map_response.json()['id']
+        # row['map_id'] = map_id
+        # kommuner.at[index, 'map_id'] = map_id  # Save to DataFrame
+        # add_topojson_to_map(row, map_id)
+
+
+        # url = f"https://api.datawrapper.de/v3/charts/{map_id}"
+        # headers = {
+        #     "Authorization": f"Bearer {DW_TOKEN}"
+        # }
 
-    # response = requests.get(url, headers=headers)
-    # response.raise_for_status()
+        # response = requests.get(url, headers=headers)
+        # response.raise_for_status()
 
-    # # Pretty print the full metadata
-    # chart = response.json()
-    # print(json.dumps(chart["metadata"], indent=2))
+        # # Pretty print the full metadata
+        # chart = response.json()
+        # print(json.dumps(chart["metadata"], indent=2))
     
 
@@ -1,16 +1,15 @@
 import pandas as pd
+import numpy as np
 import os
 import glob
-############# Load data #############
+from functools import lru_cache
+############# Paths #############
 
 kv_path = "data/struktureret/kv/valgresultater/nationalt/nationalt_kommuner_parti_procenter.csv"
 kv_valgsted_path = "data/struktureret/kv/valgresultater/afstemningssteder/"
 rv_path = "data/struktureret/rv/valgresultater/nationalt/nationalt_kommuner_parti_procenter.csv"
 rv_valgsted_path = "data/struktureret/rv/valgresultater/afstemningssteder/"
 
-national_kv = pd.read_csv(kv_path, sep=";")
-national_rv = pd.read_csv(rv_path, sep=";")
-
 ############# Color maps #############
 
 largest_party_colors = {
@@ -58,6 +57,31 @@ non_party_columns = ["region","kommune_kode", "kommune", "største_parti", "pop_
 
 ############# Generic function to add popups to a dataframe #############
 
+@lru_cache(maxsize=None)
+def _party_line_prefix(party: str) -> str:
+    """HTML for a party line up to the percentage, built once per party."""
+    color = party_colors.get(party, default_color)
+
+    # bar cell
+    bar_span = (
+        f"<span style='display:inline-block; "
+        f"width:0.3em; height:1.2em; vertical-align:middle;"
+        f"background:{color};'></span>"
+    )
+
+    # fixed-width label cell (so S: and SP: line up)
+    label_span = (
+        f"<span style='display:inline-block; width:30px; font-size:1em;"
+        f"vertical-align:middle; margin-left: 4px'>{party}</span>"
+    )
+
+    # start of the percentage cell, fixed width & right-aligned
+    pct_start = (
+        "<span style='display:inline-block; width:50px; "
+        "text-align:left; font-size:1em; vertical-align:middle'>"
+    )
+    return bar_span + label_span + pct_start
+
 def add_popups(
                df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
@@ -73,88 +97,66 @@ def add_popups(
     # Determine party columns for this dataframe
     party_columns = [c for c in df.columns if c not in non_party_columns]
 
-    # Force party columns to numeric (strings -> float; bad values -> NaN)
-    df[party_columns] = df[party_columns].apply(pd.to_numeric, errors="coerce")
-
-    def make_popup(row):
-        largest = row["største_parti"]
-        valg = row[geo]
-
-        # if valg is afstemningssted_navn add på valgested before the name
-        if geo == "afstemningssted_navn":
-            valg = f"på valgstedet {valg}"
-        else: 
-            valg = f"i {valg}"
-
-        header_color = largest_party_colors.get(largest, default_color)
-
-        # Header line
-        header = (
-            f"<b style='color:{header_color}; font-size:1.5em;margin-bottom: 10px'>{largest}</b><br> "
-            f"blev størst {valg}<br>"
-        )
-
-        rows = []
-        for party in party_columns:
-            pct = row[party]
-            if pd.isna(pct):
-                continue
-
-            pct = float(pct)
-            color = party_colors.get(party, default_color)
-            bar_width = int(1.4 * pct)  # kept from your original code (unused but harmless)
-
-            # fixed-width label cell (so S: and SP: line up)
-            label_span = (
-                f"<span style='display:inline-block; width:30px; font-size:1em;"
-                f"vertical-align:middle; margin-left: 4px'>{party}</span>"
-            )
-
-            # bar cell
-            bar_span = (
-                f"<span style='display:inline-block; "
-                f"width:0.3em; height:1.2em; vertical-align:middle;"
-                f"background:{color};'></span>"
-            )
-
-            # percentage cell, fixed width & right-aligned
-            pct_span = (
-                f"<span style='display:inline-block; width:50px; "
-                f"text-align:left; font-size:1em; vertical-align:middle'>{pct:.1f}%</span>"
-            )
-
-            line = bar_span + label_span + pct_span
-            rows.append((pct, line))
-
-        # sort by percentage descending
-        rows.sort(key=lambda x: x[0], reverse=True)
-
-        body = "<br>".join(line for _, line in rows)
-        return header + body
-
-    df["pop_up"] = df.apply(make_popup, axis=1)
+    # Force party columns to numeric (strings -> float; bad values -> NaN). Columns that are already numeric are left as they are
+    for party in party_columns:
+        if not pd.api.types.is_numeric_dtype(df[party]):
+            df[party] = pd.to_numeric(df[party], errors="coerce")
+
+    # Header line, one per row
+    largest = df["største_parti"].to_numpy(dtype=object)
+    header_color = np.array([largest_party_colors.get(x, default_color) for x in largest], dtype=object)
+    # if geo is afstemningssted_navn add på valgstedet before the name
+    valg_prefix = "på valgstedet " if geo == "afstemningssted_navn" else "i "
+    header = (
+        "<b style='color:" + header_color + "; font-size:1.5em;margin-bottom: 10px'>"
+        + largest.astype(str).astype(object) + "</b><br> blev størst " + valg_prefix
+        + df[geo].to_numpy(dtype=object).astype(str).astype(object) + "<br>"
+    )
+
+    # Melt the party columns to one (row, party, pct) entry per non-missing value, sorted by row and
+    # then by percentage descending (ties keep the column order, like a stable sort per row)
+    values = df[party_columns].to_numpy(dtype=float, na_value=np.nan)
+    rows, cols = np.nonzero(~np.isnan(values))
+    pct = values[rows, cols]
+    order = np.lexsort((cols, -pct, rows))
+    rows, cols, pct = rows[order], cols[order], pct[order]
+
+    prefixes = np.array([_party_line_prefix(party) for party in party_columns], dtype=object)
+    lines = prefixes[cols] + np.char.mod("%.1f", pct).astype(object) + "%</span>"
+
+    # Join the lines per row
+    bounds = np.searchsorted(rows, np.arange(len(df) + 1))
+    body = ["<br>".join(lines[start:end]) for start, end in zip(bounds[:-1], bounds[1:])]
+
+    df["pop_up"] = header + np.array(body, dtype=object)
     return df
 
 
-############# Run on both dataframes #############
-national_kv = add_popups(national_kv)
-national_rv = add_popups(national_rv)
+############# Run on the national files and all polling district files #############
+if __name__ == "__main__":
+    # Filerne læses med float_precision="round_trip", så procenterne skrives tilbage uændrede. Pandas' hurtige
+    # float-parser kan ramme ved siden af i sidste decimal, og så flyttede hver kørsel tallene en smule
+    national_kv = pd.read_csv(kv_path, sep=";", float_precision="round_trip")
+    national_rv = pd.read_csv(rv_path, sep=";", float_precision="round_trip")
+
+    national_kv = add_popups(national_kv)
+    national_rv = add_popups(national_rv)
 
-# Save for Datawrapper (overwrite original files – adjust if you want new filenames)
-national_kv.to_csv(kv_path, index=False, sep=";")
-national_rv.to_csv(rv_path, index=False, sep=";")
+    # Save for Datawrapper (overwrite original files – adjust if you want new filenames)
+    national_kv.to_csv(kv_path, index=False, sep=";")
+    national_rv.to_csv(rv_path, index=False, sep=";")
 
 
-for path in [kv_valgsted_path, rv_valgsted_path]:
-    print(f"Processing files in {path}")
-    try:
-        file_pattern = os.path.join(path, "*.csv")
-        all_files = glob.glob(file_pattern)
+    for path in [kv_valgsted_path, rv_valgsted_path]:
+        print(f"Processing files in {path}")
+        try:
+            file_pattern = os.path.join(path, "*.csv")
+            all_files = glob.glob(file_pattern)
 
-        for file in all_files:
-            print(f"Processing file {file}")
-            df = pd.read_csv(file, sep=";")
-            df = add_popups(df)
-            df.to_csv(file, index=False, sep=";")
-    except Exception as e:
-        print(f"Error processing files in {path}: {e}")
\ No newline at end of file
+            for file in all_files:
+                print(f"Processing file {file}")
+                df = pd.read_csv(file, sep=";", float_precision="round_trip")
+                df = add_popups(df)
+                df.to_csv(file, index=False, sep=";")
+        except Exception as e:
+            print(f"Error processing files in {path}: {e}")
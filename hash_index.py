@@ -0,0 +1,78 @@
+import hashlib
+import json
+import os
+
+from config import HASH_INDEX_FILE
+from valg_json import loads
+
+# Hver json-fil fra valg.dk har en .json.hash-fil ved siden af. Indholdet er en binær
+# signatur, som vi ikke kan verificere uden nøglen, men den ændrer sig kun når json-filen gør,
+# så vi bruger sha256 af den som nøgle for filens indhold. Indekset gemmer desuden sha256 af
+# selve json-filen, så vi kan opdage korrupte eller halve filer.
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def index_key(path, valg_dir) -> str:
+    """Key of a file in the index: its path relative to data/raw/<valg>/."""
+    return os.path.relpath(path, valg_dir).replace(os.sep, "/")
+
+def load_index(valg_dir) -> dict:
+    index_path = os.path.join(valg_dir, HASH_INDEX_FILE)
+    if not os.path.exists(index_path):
+        return {}
+    try:
+        with open(index_path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Could not read hash index {index_path}: {e}")
+        return {}
+
+def save_index(valg_dir, index) -> None:
+    os.makedirs(valg_dir, exist_ok=True)
+    with open(os.path.join(valg_dir, HASH_INDEX_FILE), "w", encoding="utf-8") as f:
+        json.dump(index, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+def is_valid_json(raw: bytes) -> bool:
+    try:
+        loads(raw)
+        return True
+    except ValueError:
+        return False
+
+def read_verified(path, valg_dir, index, schema=None):
+    """Read and decode a json file (see valg_json), or return None if it does not match the index."""
+    with open(path, "rb") as f:
+        raw = f.read()
+
+    entry = index.get(index_key(path, valg_dir))
+    if entry is not None and entry.get("sha256") != digest(raw):
+        print(f"Skipping {path}: content does not match its hash index entry (corrupt or partial file)")
+        return None
+    return loads(raw, schema)
+
+def fingerprint(path, valg_dir, index) -> str:
+    """Content id of a file: the sidecar hash if indexed, otherwise size and mtime."""
+    entry = index.get(index_key(path, valg_dir))
+    if entry is not None:
+        return entry["hash"]
+    stat = os.stat(path)
+    return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+def load_state(state_path) -> dict:
+    if not os.path.exists(state_path):
+        return {}
+    with open(state_path, encoding="utf-8") as f:
+        return json.load(f)
+
+def save_state(state_path, state) -> None:
+    os.makedirs(os.path.dirname(state_path), exist_ok=True)
+    with open(state_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+def changed_files(files, valg_dir, index, state):
+    """Return the fingerprints of files, and the files (or deletions) that differ from state."""
+    fingerprints = {index_key(file, valg_dir): fingerprint(file, valg_dir, index) for file in files}
+    changed = [key for key, fp in fingerprints.items() if state.get(key) != fp]
+    changed += [key for key in state if key not in fingerprints]
+    return fingerprints, changed
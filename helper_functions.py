@@ -1,9 +1,256 @@
 import os, glob
+from pathlib import Path
+from urllib.parse import unquote
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain, repeat
+
+import pandas as pd
+
+from hash_index import read_verified, index_key, fingerprint, digest, load_state, save_state
+from valg_json import VALGRESULTAT, SchemaFejl
 
 def kombiner_resultater(from_path, to_path, valg, data_type):
     os.makedirs(to_path, exist_ok=True) # Opret output-mappen, hvis den ikke findes
-    
+
     file_pattern = os.path.join(from_path, valg, data_type, "*.json") # Find alle json-filer i den angivne mappe
-    all_files = glob.glob(file_pattern)
+    all_files = sorted(glob.glob(file_pattern)) # sorteret, så rækkefølgen i output er den samme fra kørsel til kørsel
+
+    return all_files
+
+# Skriv en DataFrame som csv, men kun hvis indholdet er ændret. Csv'en bygges i hukommelsen, og dens hash sammenlignes
+# med den eksisterende fil. Filen skrives atomisk (tmp-fil + rename), så en afbrudt kørsel ikke efterlader en halv fil.
+# Returnerer True, hvis filen blev (gen)skrevet
+def skriv_csv_hvis_ændret(df, path, **kwargs) -> bool:
+    path = Path(path)
+    data = df.to_csv(**kwargs).encode("utf-8")
+    if path.exists() and digest(path.read_bytes()) == digest(data):
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+    return True
+
+class ÆndredeFiler:
+    """Writes data files through skriv_csv_hvis_ændret and keeps track of the ones that changed.
+
+    gem() adds the changed paths to a pending list on disk, which stays there until a later
+    stage (publishing) has handled them, so several update runs between two publish runs add up.
+    """
+
+    def __init__(self, state_path):
+        self.state_path = Path(state_path)
+        self.paths = []
+
+    def skriv_csv(self, df, path, **kwargs) -> bool:
+        changed = skriv_csv_hvis_ændret(df, path, **kwargs)
+        if changed:
+            self.paths.append(Path(path))
+        return changed
+
+    def gem(self) -> list[Path]:
+        pending = set(load_state(self.state_path) or [])
+        pending.update(path.as_posix() for path in self.paths)
+        save_state(self.state_path, sorted(pending))
+        return self.paths
+
+    def afventende(self) -> list[str]:
+        """The changed paths that have not been published yet."""
+        return load_state(self.state_path) or []
+
+    def ryd(self, paths):
+        """Remove handled paths from the pending list (paths added since are kept)."""
+        pending = set(load_state(self.state_path) or []) - {Path(path).as_posix() for path in paths}
+        save_state(self.state_path, sorted(pending))
+
+# Kolonnerne i url-arket (DW_URLS) med datafilens url for hver graf, og den graf i dw_charts.json de hører til
+URL_KOLONNER = {"status_tabel": "chart1", "kort": "chart2", "parti_søjle": "chart3", "stemme_tabel": "chart4"}
+
+def _geo_nøgle(path, dw_charts):
+    # Find den geografi i dw_charts.json en datafil hører til: kommunekoden (fx 101_københavn.csv),
+    # regionen (fx østdanmark_status.csv) eller hele landet (nationalt/)
+    path = Path(path)
+    valg = path.parts[path.parts.index("struktureret") + 1]
+    if path.name[0].isdigit():
+        kode = path.name.split("_")[0]
+        return kode if kode in dw_charts else None
+
+    region = path.stem.split("_")[0]
+    for key, chart in dw_charts.items():
+        if not chart.get("slug", "").lower().startswith(valg):
+            continue
+        if path.parent.name == "nationalt":
+            if chart["name"] == "Hele landet":
+                return key
+        elif chart["name"].removeprefix("Region ").lower() == region:
+            return key
+    return None
+
+def find_berørte_grafer(paths, dw_charts, urls=None):
+    """Map changed data files to the ids of the Datawrapper charts that show them.
+
+    The URL sheet tells which chart uses which file; a file that is not in the sheet
+    falls back to every chart of its geography. Returns ({chart_id: [paths]}, [unmatched paths]).
+    """
+    fra_url = {}
+    if urls is not None:
+        for _, row in urls.iterrows():
+            charts = dw_charts.get(str(row["id"]), {})
+            for kolonne, chart_key in URL_KOLONNER.items():
+                url = unquote(str(row.get(kolonne, "")))
+                start = url.find("data/struktureret/")
+                if start >= 0 and "id" in charts.get(chart_key, {}):
+                    fra_url.setdefault(url[start:], []).append(charts[chart_key]["id"])
+
+    grafer, ukendte = {}, []
+    for path in paths:
+        path = Path(path).as_posix()
+        chart_ids = fra_url.get(path)
+        if chart_ids is None:
+            key = _geo_nøgle(path, dw_charts)
+            if key is None:
+                ukendte.append(path)
+                continue
+            chart_ids = [v["id"] for v in dw_charts[key].values() if isinstance(v, dict) and "id" in v]
+        for chart_id in chart_ids:
+            grafer.setdefault(chart_id, []).append(path)
+    return grafer, ukendte
+
+# Kolonnerne i resultat-tabellerne (ud over base-kolonnerne, som er ens for alle rækker fra ét afstemningsområde)
+PARTI_KOLONNER = ["parti", "parti_id", "parti_bogstav", "stemmer", "listestemmer", "difference_forrige_valg"]
+KANDIDAT_KOLONNER = ["kandidat", "kandidat_id", "parti", "parti_id", "parti_bogstav", "stemmer"]
+
+# Flad én valgresultat-fil ud til kolonner for partier og kandidater. Base-felterne gemmes kun én gang
+# per afstemningsområde og gentages først, når tabellerne bygges i byg_resultat_tabeller
+def parse_valgresultat(data, extra=None):
+    # define base structure for each entry (what columns do we want in the data)
+    base = {
+        **(extra or {}),
+        "kommune": data.get("Kommune"),
+        "kommune_kode": data.get("Kommunekode"),
+        "afstemningsområde": data.get("Afstemningsområde"),
+        "afstemningsområde_dagi_id": data.get("AfstemningsområdeDagiId"),
+        "frigivelsestidspunkt": data.get("FrigivelsesTidspunktUTC"),
+        "godkendelsestidspunkt": data.get("GodkendelsesDatoUTC"),
+        "resultat_art": data.get("Resultatart"),
+        "total_gyldige_stemmer": data.get("GyldigeStemmer"),
+        "total_afgivne_stemmer": data.get("AfgivneStemmer"),
+    }
+    partier = {col: [] for col in PARTI_KOLONNER}
+    kandidater = {col: [] for col in KANDIDAT_KOLONNER}
+
+    # if there are no results, add a placeholder entry
+    if data.get("Resultatart") == "IngenResultater":
+        for col, value in zip(PARTI_KOLONNER, (None, None, None, 0, 0, 0)):
+            partier[col].append(value)
+        return {"base": base, "partier": partier, "kandidater": kandidater}
+
+    # if there are results present, iterate through parties and candidates
+    for parti in data.get("Kandidatlister", []):
+        navn, parti_id, bogstav = parti.get("Navn"), parti.get("KandidatlisteId"), parti.get("Bogstavbetegnelse")
+        partier["parti"].append(navn)
+        partier["parti_id"].append(parti_id)
+        partier["parti_bogstav"].append(bogstav)
+        partier["stemmer"].append(parti.get("Stemmer", 0))
+        partier["listestemmer"].append(parti.get("Listestemmer", 0))
+        partier["difference_forrige_valg"].append(parti.get("StemmerDifferenceFraForrigeValg", 0))
+
+        for kandidat in (parti.get("Kandidater") or []):
+            kandidater["kandidat"].append(kandidat.get("Stemmeseddelnavn"))
+            kandidater["kandidat_id"].append(kandidat.get("Id"))
+            kandidater["parti"].append(navn)
+            kandidater["parti_id"].append(parti_id)
+            kandidater["parti_bogstav"].append(bogstav)
+            kandidater["stemmer"].append(kandidat.get("Stemmer", 0))
+
+    return {"base": base, "partier": partier, "kandidater": kandidater}
+
+# Byg én tabel direkte fra kolonnerne. Base-værdierne gemmes én gang per fil og gentages med antallet af rækker
+def _byg_tabel(chunks, tabel, kolonner):
+    chunks = [chunk for chunk in chunks if chunk[tabel][kolonner[0]]]
+    if not chunks:
+        return pd.DataFrame()
+    antal = [len(chunk[tabel][kolonner[0]]) for chunk in chunks]
+
+    columns = {}
+    for col in chunks[0]["base"]:
+        columns[col] = pd.Series([chunk["base"][col] for chunk in chunks]).repeat(antal).reset_index(drop=True)
+    for col in kolonner:
+        columns[col] = pd.Series(list(chain.from_iterable(chunk[tabel][col] for chunk in chunks)))
+    return pd.DataFrame(columns)
+
+def byg_resultat_tabeller(chunks, kandidater=True):
+    """Build the party and candidate DataFrames from the parsed column chunks, in file order.
+
+    With kandidater=False the candidate table is left empty (see STREAM_KANDIDATER in config.py).
+    """
+    df_kandidater = _byg_tabel(chunks, "kandidater", KANDIDAT_KOLONNER) if kandidater else pd.DataFrame()
+    return _byg_tabel(chunks, "partier", PARTI_KOLONNER), df_kandidater
+
+# Læs og flad en række valgresultat-filer ud. Returnerer (fil, (dagi_id, kolonner))
+# per fil, eller (fil, None) for filer der ikke kunne læses. Køres både direkte og i en ProcessPoolExecutor.
+# regioner er kommunekode -> region (RefData.region) for RV
+def parse_valgresultat_filer(files, valg_dir, index, regioner=None):
+    results = []
+    for file in files:
+        try:
+            data = read_verified(file, valg_dir, index, VALGRESULTAT)
+        except SchemaFejl as e:
+            # et ændret format fra valg.dk skal stoppe kørslen, ikke give tomme kolonner
+            raise SchemaFejl(f"{file}: {e}") from e
+        except Exception as e:
+            print(f"Error reading {file}: {e}")
+            data = None
+        if data is None:
+            results.append((file, None))
+            continue
+
+        extra = None
+        if regioner is not None:
+            extra = {"region": regioner.get(data.get("Kommunekode"))}
+
+        results.append((file, (data.get("AfstemningsområdeDagiId"), parse_valgresultat(data, extra=extra))))
+    return results
+
+# Flad alle valgresultat-filer ud, genbrug cachen for uændrede filer og fordel resten på workers processer.
+# Returnerer DataFrames for partier og kandidater
+def get_valgresultater(files, valg_dir, index, cache, workers=1, regioner=None, kandidater=True):
+    chunks = {}
+    to_parse = []
+    for file in files:
+        cached = cache.get(index_key(file, valg_dir), fingerprint(file, valg_dir, index))
+        if cached is None:
+            to_parse.append(file)
+        else:
+            chunks[file] = cached
+
+    if workers > 1 and len(to_parse) > 1:
+        # del filerne i flere bidder end workers, så arbejdet fordeles jævnt
+        n_chunks = min(len(to_parse), workers * 4)
+        bidder = [to_parse[i::n_chunks] for i in range(n_chunks)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = [r for rs in pool.map(parse_valgresultat_filer, bidder, repeat(valg_dir), repeat(index), repeat(regioner)) for r in rs]
+    else:
+        results = parse_valgresultat_filer(to_parse, valg_dir, index, regioner)
+
+    for file, parsed in results:
+        if parsed is None:
+            continue
+        shard_id, chunks[file] = parsed
+        cache.put(index_key(file, valg_dir), fingerprint(file, valg_dir, index), shard_id, chunks[file])
+    cache.save()
+
+    return byg_resultat_tabeller([chunks[file] for file in files if file in chunks], kandidater)
 
-    return all_files 
\ No newline at end of file
+# Giv de flade kolonner (se parse_valgresultat) for én valgresultat-fil ad gangen, uden at holde dem i hukommelsen.
+# Filer i parse-cachen læses derfra, resten parses. Filer, der ikke kan læses, springes over
+def iter_valgresultater(files, valg_dir, index, cache, regioner=None):
+    for file in files:
+        chunk = cache.peek(index_key(file, valg_dir), fingerprint(file, valg_dir, index))
+        if chunk is None:
+            [(_, parsed)] = parse_valgresultat_filer([file], valg_dir, index, regioner)
+            if parsed is None:
+                continue
+            chunk = parsed[1]
+        yield chunk
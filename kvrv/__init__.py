@@ -0,0 +1,12 @@
+# Bibliotek med logikken bag valgscripts. Modulerne har ingen sideeffekter ved import, så trinene kan
+# importeres, kombineres i én proces (valgnat.py) og benchmarkes hver for sig:
+#   kvrv.fetch      hent rådata fra SFTP-serveren
+#   kvrv.structure  strukturer valgresultater, mandater og kandidatdata
+#   kvrv.update     opdater datafilerne bag Datawrapper-graferne
+#   kvrv.kube       stemmer per parti på alle geografiske niveauer
+#   kvrv.kandidater kandidaternes stemmetal lagt sammen direkte fra de rå filer (STREAM_KANDIDATER)
+#   kvrv.publish    publicer de grafer, hvis data er ændret
+#   kvrv.refdata    opslag i kommuner.json og partier.json (kommune -> region, partibogstaver og -navne)
+#   kvrv.skema      kolonnetyper og det interne format for resultattabellerne mellem 02a/02b og 05a/05b
+#   kvrv.tilstand   seneste resultat_art, frigivelsestidspunkt og hash for hvert afstemningsområde
+# De nummererede scripts i roden er tynde kommandolinje-indgange til funktionerne her.
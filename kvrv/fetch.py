@@ -0,0 +1,245 @@
+import paramiko
+import io
+import os
+import re
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from config import (
+    FROM_PATH, HOST, PORT, USERNAME, PASSWORD, FOLDERS, KV_REMOTE_PATH, RV_REMOTE_PATH,
+    MANIFEST_FILE, SFTP_WORKERS, SFTP_RETRIES, SFTP_BACKOFF,
+)
+from hash_index import digest, is_valid_json, load_index, save_index
+
+class HentFejl(RuntimeError):
+    """Some downloads failed. hentet is the number of new or changed files that were downloaded anyway."""
+
+    def __init__(self, failed, total, hentet):
+        super().__init__(f"{failed} of {total} downloads failed")
+        self.hentet = hentet
+
+TIDSSTEMPEL = re.compile(r'-(\d{12})(?=\.)')
+
+# Valgene der skal hentes og deres sti på SFTP-serveren
+VALG = {
+    "rv": RV_REMOTE_PATH,
+    "kv": KV_REMOTE_PATH,
+}
+
+# Forbindelse til FTP-server
+def connect():
+    transport = paramiko.Transport((HOST, PORT))
+    transport.connect(username=USERNAME, password=PASSWORD)
+    return transport, paramiko.SFTPClient.from_transport(transport)
+
+# Hver tråd i download-poolen har sin egen forbindelse
+_local = threading.local()
+_connections = []
+_connections_lock = threading.Lock()
+
+def thread_sftp(reconnect=False):
+    if reconnect and getattr(_local, "sftp", None) is not None:
+        close_connection(_local.transport, _local.sftp)
+        _local.sftp = None
+    if getattr(_local, "sftp", None) is None:
+        _local.transport, _local.sftp = connect()
+        with _connections_lock:
+            _connections.append((_local.transport, _local.sftp))
+    return _local.sftp
+
+def close_connection(transport, sftp):
+    try:
+        sftp.close()
+        transport.close()
+    except Exception:
+        pass
+
+# Manifestet husker størrelse, mtime og tidsstempel for hver fil, vi allerede har hentet.
+# Med fuld=True ignoreres manifestet, så alle filer hentes igen
+def load_manifest(local_dir, fuld=False):
+    manifest_path = os.path.join(local_dir, MANIFEST_FILE)
+    if fuld or not os.path.exists(manifest_path):
+        return {}
+    try:
+        with open(manifest_path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Could not read manifest {manifest_path}, downloading everything: {e}")
+        return {}
+
+def save_manifest(local_dir, manifest):
+    os.makedirs(local_dir, exist_ok=True)
+    manifest_path = os.path.join(local_dir, MANIFEST_FILE)
+    with open(manifest_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1, sort_keys=True)
+
+def sorterbart_tidsstempel(tidsstempel):
+    # ddmmyyyyHHMM -> yyyymmddHHMM, så tidsstempler kan sammenlignes
+    if not tidsstempel:
+        return ""
+    return tidsstempel[4:8] + tidsstempel[2:4] + tidsstempel[0:2] + tidsstempel[8:]
+
+# Find de filer i en mappe på serveren, der er nye eller ændrede siden sidst
+def list_changed_files(sftp, remote_dir, local_dir, folder_name, manifest):
+    remote_files = sftp.listdir_attr(remote_dir+"/"+folder_name)
+
+    # Find den nyeste udgave af hver fil (samme navn uden tidsstempel)
+    newest = {}
+    for attr in remote_files:
+        match = TIDSSTEMPEL.search(attr.filename)
+        tidsstempel = match.group(1) if match else None
+        new_file = TIDSSTEMPEL.sub('', attr.filename)
+        current = newest.get(new_file)
+        if current is None or sorterbart_tidsstempel(tidsstempel) >= sorterbart_tidsstempel(current[1]):
+            newest[new_file] = (attr, tidsstempel)
+
+    def describe(new_file):
+        attr, tidsstempel = newest[new_file]
+        return {
+            "key": folder_name + "/" + new_file,
+            "remote": remote_dir + "/" + folder_name + "/" + attr.filename,
+            "local": os.path.join(local_dir, folder_name, new_file),
+            "entry": {
+                "remote": attr.filename,
+                "size": attr.st_size,
+                "mtime": attr.st_mtime,
+                "tidsstempel": tidsstempel,
+            },
+        }
+
+    # .hash-filerne hentes sammen med den json-fil, de hører til
+    jobs, skipped = [], 0
+    for new_file in newest:
+        if new_file.endswith(".hash") and new_file[:-len(".hash")] in newest:
+            continue
+        job = describe(new_file)
+        job["sidecar"] = describe(new_file + ".hash") if new_file + ".hash" in newest else None
+
+        unchanged = [job] + ([job["sidecar"]] if job["sidecar"] else [])
+        if all(manifest.get(f["key"]) == f["entry"] and os.path.exists(f["local"]) for f in unchanged):
+            skipped += 1
+            continue
+        jobs.append(job)
+
+    print(f"{remote_dir}/{folder_name}: {len(jobs)} new or changed files, {skipped} unchanged")
+    return jobs
+
+def write_atomic(path, raw):
+    tmp_path = path + ".part"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+
+# Hent én fil med retry og eksponentiel backoff. Hvis filen har en .hash-fil, hentes den først,
+# og selve filen springes over, hvis hashen er den samme som i vores indeks. Json-filer
+# tjekkes, før de lægges på plads, så en afbrudt eller korrupt download aldrig efterlader en halv fil
+def download_file(job, index_entry):
+    os.makedirs(os.path.dirname(job["local"]), exist_ok=True)
+    for attempt in range(SFTP_RETRIES + 1):
+        try:
+            sftp = thread_sftp(reconnect=attempt > 0)
+
+            sidecar = None
+            if job["sidecar"] is not None:
+                buffer = io.BytesIO()
+                sftp.getfo(job["sidecar"]["remote"], buffer)
+                sidecar = buffer.getvalue()
+                if (index_entry is not None and index_entry["hash"] == digest(sidecar)
+                        and os.path.exists(job["local"])):
+                    return len(sidecar), index_entry, True
+
+            buffer = io.BytesIO()
+            sftp.getfo(job["remote"], buffer)
+            raw = buffer.getvalue()
+            if job["local"].endswith(".json") and not is_valid_json(raw):
+                raise ValueError("downloaded file is not valid JSON")
+
+            write_atomic(job["local"], raw)
+            if sidecar is not None:
+                write_atomic(job["sidecar"]["local"], sidecar)
+            entry = {
+                "hash": digest(sidecar if sidecar is not None else raw),
+                "sha256": digest(raw),
+            }
+            return len(raw) + len(sidecar or b""), entry, False
+        except Exception as e:
+            if attempt == SFTP_RETRIES:
+                raise
+            wait = SFTP_BACKOFF * 2 ** attempt
+            print(f"Retrying {job['remote']} in {wait:.1f}s ({e})")
+            time.sleep(wait)
+
+def download_all(jobs, manifests, indexes):
+    n_files, n_bytes, n_unchanged, failed = 0, 0, 0, 0
+    start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=SFTP_WORKERS) as pool:
+        futures = {
+            pool.submit(download_file, job, indexes[valg].get(job["key"])): (valg, job)
+            for valg, job in jobs
+        }
+        for future in as_completed(futures):
+            valg, job = futures[future]
+            try:
+                size, index_entry, unchanged = future.result()
+            except Exception as e:
+                failed += 1
+                print(f"Failed to download {job['remote']}: {e}")
+                continue
+
+            n_bytes += size
+            if unchanged:
+                n_unchanged += 1
+            else:
+                n_files += 1
+            for f in [job] + ([job["sidecar"]] if job["sidecar"] else []):
+                manifests[valg][f["key"]] = f["entry"]
+            if job["local"].endswith(".json"):
+                indexes[valg][job["key"]] = index_entry
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    print(
+        f"Downloaded {n_files} files ({n_bytes / 1e6:.1f} MB) in {elapsed:.1f}s "
+        f"with {SFTP_WORKERS} workers: {n_files / elapsed:.1f} files/s, "
+        f"{n_bytes / 1e6 / elapsed:.2f} MB/s, {n_unchanged} skipped with unchanged hash, {failed} failed"
+    )
+    return n_files, failed
+
+# Find ændrede filer for både RV25 og KV25 og hent dem samlet, så de to valg hentes parallelt.
+# Returnerer antallet af nye eller ændrede filer, der blev hentet. Fejler nogen af filerne, rejses HentFejl, når
+# manifestet er gemt. De fejlede filer står ikke i manifestet og hentes igen næste gang
+def hent(fuld=False):
+    transport, sftp = connect()
+    manifests, indexes, jobs = {}, {}, []
+    try:
+        for valg, remote_path in VALG.items():
+            local_path = FROM_PATH + valg
+            manifests[valg] = load_manifest(local_path, fuld)
+            indexes[valg] = load_index(local_path)
+            print("Trying to download:", remote_path)
+            for folder in FOLDERS:
+                jobs += [(valg, job) for job in list_changed_files(sftp, remote_path, local_path, folder, manifests[valg])]
+    finally:
+        close_connection(transport, sftp)
+
+    if not jobs:
+        print("No changed files on the SFTP server.")
+        return 0
+
+    try:
+        n_files, failed = download_all(jobs, manifests, indexes)
+    finally:
+        for valg, manifest in manifests.items():
+            save_manifest(FROM_PATH + valg, manifest)
+            save_index(FROM_PATH + valg, indexes[valg])
+        # Luk forbindelserne
+        for connection in _connections:
+            close_connection(*connection)
+        _connections.clear()
+
+    if failed:
+        raise HentFejl(failed, len(jobs), n_files)
+    print("Downloaded RV25 and KV25 data.")
+    return n_files
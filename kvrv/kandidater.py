@@ -0,0 +1,55 @@
+import os
+
+import pandas as pd
+
+from config import FROM_PATH, TO_PATH, FOLDERS, CACHE_PATH
+from helper_functions import kombiner_resultater, iter_valgresultater
+from hash_index import load_index
+from parse_cache import open_cache
+from kvrv.refdata import load_refdata
+
+# Kandidaternes stemmetal uden den fulde kandidattabel (én række per kandidat og afstemningsområde). De rå
+# valgresultat-filer gås igennem én ad gangen, og stemmerne lægges direkte sammen per kandidat og kommune/region.
+# Hukommelsen afhænger derfor af antallet af kandidater, ikke af kandidater x afstemningsområder.
+# Bruges af 05a/05b, når STREAM_KANDIDATER er slået til (config.py).
+
+def kandidatstemmer(geo, refdata=None, from_path=FROM_PATH, to_path=TO_PATH) -> pd.DataFrame:
+    """Candidate votes per kommune/region, folded straight from the raw result files.
+
+    Returns one row per candidate and kommune/region with the columns get_stemmetal() groups on
+    (kandidat, parti, parti_bogstav, the geography columns and stemmer). Like the candidate table,
+    districts without results are left out, and a file delivered twice with the same base fields
+    (as drop_duplicates on the table removed) is only counted once.
+    """
+    valg_dir = os.path.join(from_path, geo.valg)
+    files = kombiner_resultater(from_path, to_path, geo.valg, FOLDERS[0])
+    cache = open_cache(os.path.join(CACHE_PATH, geo.valg, FOLDERS[0]))
+    # Regionen kommer fra kommunekoden, ligesom i 02b
+    regioner = (load_refdata() if refdata is None else refdata).region if "region" in geo.geo_kolonner else None
+
+    totaler = {}  # (kandidat_id, *geografi) -> [kandidat, parti, parti_bogstav, stemmer]
+    sete = set()
+    for chunk in iter_valgresultater(files, valg_dir, load_index(valg_dir), cache, regioner):
+        base = chunk["base"]
+        if base["resultat_art"] == "IngenResultater":
+            continue
+        fil_nøgle = tuple(base.values())
+        if fil_nøgle in sete:
+            continue
+        sete.add(fil_nøgle)
+
+        geografi = tuple(base[kolonne] for kolonne in geo.geo_kolonner)
+        kolonner = chunk["kandidater"]
+        for kandidat_id, kandidat, parti, bogstav, stemmer in zip(
+            kolonner["kandidat_id"], kolonner["kandidat"], kolonner["parti"], kolonner["parti_bogstav"], kolonner["stemmer"]
+        ):
+            total = totaler.get((kandidat_id, *geografi))
+            if total is None:
+                totaler[kandidat_id, *geografi] = [kandidat, parti, bogstav, stemmer or 0]
+            else:
+                total[3] += stemmer or 0
+
+    kolonner = ["kandidat", "parti", "parti_bogstav", "stemmer"]
+    rækker = [(*total[:3], *nøgle[1:], total[3]) for nøgle, total in totaler.items()]
+    stemmer = pd.DataFrame(rækker, columns=kolonner[:3] + geo.geo_kolonner + kolonner[3:])
+    return geo.rens(stemmer)
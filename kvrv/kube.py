@@ -0,0 +1,73 @@
+import pandas as pd
+
+# Niveauerne i kuben, fra det mindste til hele landet, og kolonnen der identificerer en geografi på hvert niveau
+NIVEAUER = ["afstemningsområde", "kommune", "region", "land"]
+NØGLER = {"afstemningsområde": "afstemningsområde_dagi_id", "kommune": "kommune_kode", "region": "region"}
+PARTI = ["parti", "bogstav", "parti_bogstav"]
+
+class Kube:
+    """Votes per party and valid votes at every level of the geography, built once per run.
+
+    The results are grouped once at the polling-district level. Every level above
+    (kommune, region if the results have a region column, and land) is summed from
+    the level below, so the output writers only take slices of tables that are
+    already computed:
+
+        stemmer[niveau]  one row per geography and party (key columns + parti, bogstav, parti_bogstav, stemmer)
+        gyldige[niveau]  valid votes per geography, indexed by the level's key ("Hele landet" for land)
+        afstemningsområder  party percentages per polling district, one column per party letter
+
+    partier() and procent_per_afstemningsområde() return the slice for one geography. The
+    tables are split into a dict per geography the first time a level is asked for, so a
+    loop over all kommuner costs one groupby and then a dict lookup per kommune.
+    """
+
+    def __init__(self, partier: pd.DataFrame, afst_index: list):
+        self.niveauer = [n for n in NIVEAUER if n not in NØGLER or NØGLER[n] in partier.columns]
+        self.stemmer = {}
+        self.gyldige = {}
+
+        # Nederste niveau: hvert afstemningsområde med nøglerne for de niveauer, det ligger under
+        nøgler = [NØGLER[n] for n in self.niveauer if n in NØGLER]
+        stemmer = partier.groupby(nøgler + PARTI, as_index=False)["stemmer"].sum()
+        # total_gyldige_stemmer står på hver partirække, så hvert afstemningsområde tæller kun én gang
+        gyldige = partier.groupby(nøgler)["total_gyldige_stemmer"].max()
+        self._gem(self.niveauer[0], stemmer, gyldige)
+
+        # Summer op niveau for niveau
+        for niveau in self.niveauer[1:-1]:
+            nøgler = nøgler[1:]
+            stemmer = stemmer.groupby(nøgler + PARTI, as_index=False)["stemmer"].sum()
+            gyldige = gyldige.groupby(level=nøgler).sum()
+            self._gem(niveau, stemmer, gyldige)
+
+        self.stemmer["land"] = stemmer.groupby(PARTI, as_index=False)["stemmer"].sum()
+        self.gyldige["land"] = pd.Series({"Hele landet": gyldige.sum()})
+
+        # Procent per afstemningsområde. Hver række i resultaterne er et parti i et afstemningsområde
+        procent = partier.assign(parti_procent=partier["stemmer"] / partier["total_gyldige_stemmer"] * 100)
+        self.afstemningsområder = procent.pivot_table(index=afst_index, columns="bogstav", values="parti_procent").reset_index()
+        self.afst_index = afst_index
+        self._udsnit = {}
+
+    def _gem(self, niveau, stemmer, gyldige):
+        self.stemmer[niveau] = stemmer
+        self.gyldige[niveau] = gyldige.droplevel(list(range(1, gyldige.index.nlevels))) if gyldige.index.nlevels > 1 else gyldige
+
+    def _del_op(self, navn, tabel, niveau):
+        # Del tabellen op per geografi én gang: {nøgle: udsnit}
+        if (navn, niveau) not in self._udsnit:
+            self._udsnit[navn, niveau] = (dict(tuple(tabel.groupby(NØGLER[niveau], sort=False))), tabel.iloc[:0])
+        return self._udsnit[navn, niveau]
+
+    def partier(self, niveau, nøgle):
+        """Votes per party in one geography on a level."""
+        udsnit, tom = self._del_op("stemmer", self.stemmer[niveau], niveau)
+        return udsnit.get(nøgle, tom)
+
+    def procent_per_afstemningsområde(self, niveau, nøgle):
+        """Party percentages for the polling districts in one geography, only with the parties that ran there."""
+        udsnit, tom = self._del_op("afstemningsområder", self.afstemningsområder, niveau)
+        wide = udsnit.get(nøgle, tom)
+        partier = wide.drop(columns=self.afst_index)
+        return wide.drop(columns=partier.columns[partier.isna().all().to_numpy()]).reset_index(drop=True)
@@ -0,0 +1,70 @@
+import json
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config import TO_PATH, AENDREDE_FILER, DW_URLS, DW_CHARTS
+from helper_functions import ÆndredeFiler, find_berørte_grafer
+
+def dw_token():
+    """Return DW_TOKEN from the environment (or a .env file if python-dotenv is installed)."""
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        pass
+    else:
+        load_dotenv()
+
+    token = os.getenv("DW_TOKEN")
+    if token is None:
+        raise ValueError("DW_TOKEN not found in .env file")
+    return token
+
+def load_dw_charts(path=DW_CHARTS):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def load_urls(url=DW_URLS):
+    """Read the URL sheet, or return None (all charts per geography are then published) if it cannot be read."""
+    try:
+        return pd.read_csv(url)
+    except Exception as e:
+        print(f"Could not read the URL sheet, falling back to all charts per geography: {e}")
+        return None
+
+def alle_grafer(dw_charts):
+    return [values["id"] for chart in dw_charts.values() for values in chart.values()
+            if isinstance(values, dict) and "id" in values]
+
+# Publicer graferne samtidigt via klienten (fælles forbindelser, rate limit og retries). Returnerer de id'er, der fejlede
+def publish_charts(client, chart_ids):
+    fejlede = []
+    for chart_id, result in client.publish_many(chart_ids).items():
+        if result is True:
+            print(f"Published chart with id {chart_id}")
+        else:
+            print(f"Could not publish {chart_id}: {result}")
+            fejlede.append(chart_id)
+    return fejlede
+
+def publish_all(client, dw_charts):
+    return publish_charts(client, alle_grafer(dw_charts))
+
+# Publicer kun de grafer, hvis datafiler er ændret siden sidste publicering (se ÆndredeFiler i helper_functions)
+def publish_changed(client, dw_charts, urls=None):
+    for valg in ("kv", "rv"):
+        ændrede_filer = ÆndredeFiler(Path(TO_PATH) / valg / AENDREDE_FILER)
+        paths = ændrede_filer.afventende()
+        if not paths:
+            print(f"{valg}: no changed data files, nothing to publish")
+            continue
+
+        grafer, ukendte = find_berørte_grafer(paths, dw_charts, urls)
+        print(f"{valg}: {len(paths)} changed data files -> {len(grafer)} charts")
+        for path in ukendte:
+            print(f"No chart found for {path}")
+
+        # en fil er først håndteret, når alle dens grafer er publiceret. Ellers prøves den igen næste gang
+        fejlede = {path for chart_id in publish_charts(client, grafer) for path in grafer[chart_id]}
+        ændrede_filer.ryd([path for path in paths if path not in fejlede])
@@ -0,0 +1,81 @@
+import json
+import os
+import pickle
+
+from config import KOMMUNE_INFO, PARTIER_INFO, CACHE_PATH, REFDATA_CACHE
+
+# Bump når indeksene ændrer sig, så en gammel cache ikke genbruges
+REFDATA_VERSION = 1
+
+class RefData:
+    """Dict indexes over kommuner.json and partier.json, so lookups don't loop over the lists.
+
+        region[kommunekode]        region of a kommune (the code both as int and as the string in kommuner.json)
+        listebogstav_navn/_bogstav Altinget party name/letter for a letter on the ballot
+        bogstav_navn               party name for an Altinget letter
+        navn_bogstav               Altinget letter for a party name (the borgmestre sheet uses names)
+
+    The indexes are built with the same comprehensions as the loops they replace, so
+    duplicate keys (several parties in partier.json without a listebogstav) resolve the
+    same way: the last entry wins.
+    """
+
+    def __init__(self, kommuner: list, partier: list):
+        self.kommuner = kommuner
+        self.partier = partier
+        self.region = {}
+        for kommune in kommuner:
+            self.region[kommune["kommune_id"]] = kommune["region"]
+            self.region[int(kommune["kommune_id"])] = kommune["region"]
+        self.listebogstav_navn = {p["listebogstav"]: p["navn"] for p in partier}
+        self.listebogstav_bogstav = {p["listebogstav"]: p["bogstav"] for p in partier}
+        self.bogstav_navn = {p["bogstav"]: p["navn"] for p in partier}
+        self.navn_bogstav = {p["navn"]: p["bogstav"] for p in partier}
+
+def _fingerprint(paths):
+    return [(path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in paths]
+
+def _byg(kommune_path, partier_path):
+    with open(kommune_path, "r", encoding="utf-8") as f:
+        kommuner = json.load(f)
+    with open(partier_path, "r", encoding="utf-8") as f:
+        partier = json.load(f)
+    return RefData(kommuner, partier)
+
+_indlæst = {}
+
+def load_refdata(kommune_path=KOMMUNE_INFO, partier_path=PARTIER_INFO, cache_path=os.path.join(CACHE_PATH, REFDATA_CACHE)) -> RefData:
+    """Return the reference-data indexes, shared by every caller in the process.
+
+    The built indexes are pickled next to the parse cache and reused as long as
+    kommuner.json and partier.json have the same size and mtime.
+    """
+    fingerprint = _fingerprint([kommune_path, partier_path])
+    nøgle = (kommune_path, partier_path)
+    if nøgle in _indlæst and _indlæst[nøgle][0] == fingerprint:
+        return _indlæst[nøgle][1]
+
+    refdata = None
+    try:
+        with open(cache_path, "rb") as f:
+            cached = pickle.load(f)
+        if cached["version"] == REFDATA_VERSION and cached["fingerprint"] == fingerprint:
+            refdata = cached["refdata"]
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not read reference-data cache {cache_path}, rebuilding it: {e}")
+
+    if refdata is None:
+        refdata = _byg(kommune_path, partier_path)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"version": REFDATA_VERSION, "fingerprint": fingerprint, "refdata": refdata}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError as e:
+            print(f"Could not write reference-data cache {cache_path}: {e}")
+
+    _indlæst[nøgle] = (fingerprint, refdata)
+    return refdata
@@ -0,0 +1,113 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+# Resultattabellerne (<valg>25_resultater_partier/kandidater) gives videre fra 02a/02b til 05a/05b i et internt
+# format med faste kolonnetyper ved siden af csv'en. csv'en er stadig den offentlige udgave, der ligger i repoet,
+# men opdateringen læser den interne fil og skal hverken fjerne dubletter eller gætte kolonnetyper igen.
+# Formatet er pandas' egen pickle, som gemmer kategorier og int32 uændret og ikke kræver flere pakker.
+
+# Kolonnetyper for resultattabellerne, fælles for strukturering og opdatering. Tekst, der går igen på hver
+# række (kommune, parti, afstemningsområde, kandidat, ...), gemmes som kategorier, og stemmetal som nullable
+# heltal, så manglende værdier hverken gør kolonnen til float eller object. Kommunekoder er under 1000, mens
+# stemmetallene i et afstemningsområde kan komme over 32767 (fx brevstemmer i RV), så de er 32-bit
+SKEMA = {
+    "region": "category",
+    "kommune": "category",
+    "kommune_kode": "Int16",
+    "afstemningsområde": "category",
+    "afstemningsområde_dagi_id": "Int32",
+    "resultat_art": "category",
+    "total_gyldige_stemmer": "Int32",
+    "total_afgivne_stemmer": "Int32",
+    "kandidat": "category",
+    "kandidat_id": "category",
+    "parti": "category",
+    "parti_id": "category",
+    "parti_bogstav": "category",
+    "stemmer": "Int32",
+    "listestemmer": "Int32",
+    "difference_forrige_valg": "Int32",
+}
+# Tidspunkterne fra valg.dk er i UTC (FrigivelsesTidspunktUTC) og parses med parse_tidspunkter i alle struktureringstrin
+TIDSPUNKTER = ["frigivelsestidspunkt", "godkendelsestidspunkt"]
+RÅ_TIDSFORMAT = "%d-%m-%Y %H:%M:%S"
+TIDSTYPE = "datetime64[us, UTC]"
+INTERN_ENDELSE = ".pkl"
+
+# Tusindvis af rækker deler det samme frigivelsestidspunkt, så hver tekst parses kun én gang per proces og
+# gemmes her (format, tekst) -> tidspunkt. Der er højst nogle tusinde forskellige tidspunkter på en valgnat
+_parsede_tidspunkter = {}
+
+def parse_tidspunkter(kolonne: pd.Series, format=RÅ_TIDSFORMAT) -> pd.Series:
+    """Parse a column of timestamp strings as UTC. Used for all timestamps from valg.dk.
+
+    Only the distinct strings that have not been seen before in this process are parsed,
+    and the results are mapped back onto the rows. Strings that do not match the format
+    and missing values become NaT.
+    """
+    koder, tekster = pd.factorize(kolonne)
+    nye = [tekst for tekst in tekster if (format, tekst) not in _parsede_tidspunkter]
+    if nye:
+        parsede = pd.to_datetime(pd.Series(nye, dtype=object), format=format, errors="coerce", utc=True)
+        _parsede_tidspunkter.update(zip([(format, tekst) for tekst in nye], parsede))
+    unikke = pd.array([_parsede_tidspunkter[format, tekst] for tekst in tekster], dtype=TIDSTYPE)
+    return pd.Series(unikke.take(koder, allow_fill=True), index=kolonne.index, name=kolonne.name)
+
+def _tidspunkt(kolonne: pd.Series, format) -> pd.Series:
+    if not pd.api.types.is_datetime64_any_dtype(kolonne):
+        return parse_tidspunkter(kolonne, format)
+    if kolonne.dt.tz is None:
+        return kolonne.dt.tz_localize("UTC")
+    return kolonne
+
+def anvend_skema(df: pd.DataFrame, tidsformat="ISO8601") -> pd.DataFrame:
+    """Cast the result columns that are present to the types in SKEMA and parse the timestamps as UTC.
+
+    tidsformat is the format of timestamps that are still text: RÅ_TIDSFORMAT for the raw
+    files, ISO 8601 (the default) for the CSVs. Columns that already have the type are left as is.
+    """
+    for kolonne, dtype in SKEMA.items():
+        if kolonne in df and df[kolonne].dtype != dtype:
+            df[kolonne] = df[kolonne].astype(dtype)
+    for kolonne in TIDSPUNKTER:
+        if kolonne in df:
+            df[kolonne] = _tidspunkt(df[kolonne], tidsformat)
+    return df
+
+def intern_sti(csv_path) -> Path:
+    return Path(csv_path).with_suffix(INTERN_ENDELSE)
+
+def skriv_csv(df: pd.DataFrame, csv_path):
+    """Write a public CSV. Timestamps are in UTC and are written without the time zone, as they always were."""
+    # Det er også langt hurtigere end at formatere tidspunkter med tidszone
+    uden_tidszone = {
+        kolonne: df[kolonne].dt.tz_localize(None)
+        for kolonne, dtype in df.dtypes.items() if isinstance(dtype, pd.DatetimeTZDtype)
+    }
+    df.assign(**uden_tidszone).to_csv(csv_path, index=False)
+
+def gem_resultater(df: pd.DataFrame, csv_path):
+    """Write a result table as the public CSV and, next to it, the typed internal file for the update stage."""
+    df = anvend_skema(df.drop_duplicates().reset_index(drop=True))
+    skriv_csv(df, csv_path)
+    # Den interne fil skrives efter csv'en, så den er mindst lige så ny
+    df.to_pickle(intern_sti(csv_path))
+
+def læs_resultater(csv_path) -> pd.DataFrame:
+    """Read a result table written by gem_resultater, typed and without duplicates.
+
+    The internal file is only used when it is at least as new as the CSV. Otherwise (a CSV
+    from git, or written by an older version) the CSV is read and given the same types.
+    """
+    intern = intern_sti(csv_path)
+    try:
+        if os.stat(intern).st_mtime_ns >= os.stat(csv_path).st_mtime_ns:
+            return pd.read_pickle(intern)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        print(f"Could not read {intern}, reading the CSV instead: {e}")
+
+    return anvend_skema(pd.read_csv(csv_path).drop_duplicates().reset_index(drop=True))
@@ -0,0 +1,281 @@
+import os
+import glob
+from pathlib import Path
+
+import pandas as pd
+
+from config import FROM_PATH, TO_PATH, FOLDERS, STATE_FILE, CACHE_PATH, STREAM_KANDIDATER, OMRAADE_TILSTAND
+from helper_functions import kombiner_resultater, get_valgresultater
+from hash_index import load_index, read_verified, changed_files, load_state, save_state
+from parse_cache import open_cache
+from kvrv.refdata import load_refdata
+from kvrv.tilstand import opdater_tilstand
+from kvrv.skema import anvend_skema, gem_resultater, parse_tidspunkter, skriv_csv, RÅ_TIDSFORMAT
+from valg_json import load_file, MANDATFORDELING, KANDIDAT_DATA, SchemaFejl
+
+# Kolonnerne i de tomme tabeller, der gemmes, før der er kommet resultater
+RESULTAT_BASE_KOLONNER = [
+    "kommune", "kommune_kode", "afstemningsområde", "afstemningsområde_dagi_id",
+    "frigivelsestidspunkt", "godkendelsestidspunkt", "resultat_art",
+    "total_gyldige_stemmer", "total_afgivne_stemmer",
+]
+TOMME_PARTIER = ["parti", "parti_id", "parti_bogstav", "stemmer", "listestemmer", "difference_forrige_valg"]
+TOMME_KANDIDATER = ["kandidat", "kandidat_id", "parti", "parti_id", "parti_bogstav", "stemmer"]
+
+# ----------------------------
+# Valgresultater (02a/02b)
+# ----------------------------
+
+# KV25 - Valgresultater
+def get_kv_resultater(from_path=FROM_PATH, to_path=TO_PATH, folders=FOLDERS, workers=1, *_unused, kandidater=True):
+    files = kombiner_resultater(from_path, to_path, "kv", folders[0])
+    valg_dir = os.path.join(from_path, "kv")
+    index = load_index(valg_dir)
+    cache = open_cache(os.path.join(CACHE_PATH, "kv", folders[0]))
+
+    # genbrug de cachede kolonner for uændrede filer, og parse resten (parallelt hvis workers > 1)
+    return get_valgresultater(files, valg_dir, index, cache, workers=workers, kandidater=kandidater)
+
+# RV25 - Valgresultater
+def get_rv_resultater(from_path=FROM_PATH, to_path=TO_PATH, folders=FOLDERS, refdata=None, workers=1, *_unused, kandidater=True):
+    files = kombiner_resultater(from_path, to_path, "rv", folders[0])  # "valgresultater"
+    valg_dir = os.path.join(from_path, "rv")
+    index = load_index(valg_dir)
+    cache = open_cache(os.path.join(CACHE_PATH, "rv", folders[0]))
+
+    # genbrug de cachede kolonner for uændrede filer, og parse resten (parallelt hvis workers > 1).
+    # Regionen slås op ud fra kommunekoden i indekset over kommuner.json
+    if refdata is None:
+        refdata = load_refdata()
+    return get_valgresultater(files, valg_dir, index, cache, workers=workers, regioner=refdata.region, kandidater=kandidater)
+
+def strukturer_resultater(valg, workers=1, refdata=None, stream_kandidater=STREAM_KANDIDATER):
+    """Write <valg>25_resultater_partier/kandidater.csv from the raw result files.
+
+    Does nothing when no result file changed since the last run. Returns True if the files were written.
+    With stream_kandidater the candidate table is not built: 05a/05b then fold the candidate votes
+    from the raw files themselves (kvrv/kandidater.py).
+    """
+    outdir = Path(TO_PATH) / valg
+
+    # Brug hash-indekset til at se, om nogen filer har ændret sig siden sidste kørsel
+    valg_dir = os.path.join(FROM_PATH, valg)
+    state_path = outdir / STATE_FILE.format(FOLDERS[0])
+    fingerprints, changed = changed_files(
+        kombiner_resultater(FROM_PATH, TO_PATH, valg, FOLDERS[0]), valg_dir, load_index(valg_dir), load_state(state_path)
+    )
+    tabeller = ["partier"] if stream_kandidater else ["partier", "kandidater"]
+    filer = [f"{valg}25_resultater_{tabel}.csv" for tabel in tabeller] + [OMRAADE_TILSTAND]
+    if not changed and all((outdir / fil).exists() for fil in filer):
+        print("No changed result files since last run, nothing to structure.")
+        return False
+    print(f"{len(changed)} changed result files since last run.")
+
+    if valg == "kv":
+        df_partier, df_kandidater = get_kv_resultater(FROM_PATH, TO_PATH, FOLDERS, workers, kandidater=not stream_kandidater)
+        base_kolonner = RESULTAT_BASE_KOLONNER
+    else:
+        df_partier, df_kandidater = get_rv_resultater(FROM_PATH, TO_PATH, FOLDERS, refdata, workers, kandidater=not stream_kandidater)
+        base_kolonner = ["region"] + RESULTAT_BASE_KOLONNER
+
+    # Giv kolonnerne typerne fra kvrv/skema.py med det samme (kategorier, små heltal og tidspunkter i UTC),
+    # så de store tabeller også fylder mindre her
+    df_partier = anvend_skema(df_partier, RÅ_TIDSFORMAT)
+    df_kandidater = anvend_skema(df_kandidater, RÅ_TIDSFORMAT)
+
+    if df_partier.empty:
+        # save an empty dataframe with the correct columns
+        df_partier = pd.DataFrame(columns=base_kolonner + TOMME_PARTIER)
+
+    outdir.mkdir(parents=True, exist_ok=True)
+    gem_resultater(df_partier, outdir / f"{valg}25_resultater_partier.csv")
+    # Tilstandstabellen over afstemningsområderne opdateres med de ændrede filer, som nu ligger i parse-cachen
+    opdater_tilstand(valg, refdata)
+    if stream_kandidater:
+        save_state(state_path, fingerprints)
+        return True
+
+    # check if df_kandidater is not empty before saving
+    if df_kandidater.empty:
+        # save an empty dataframe with the correct columns
+        df_kandidater = pd.DataFrame(columns=base_kolonner + TOMME_KANDIDATER)
+
+    if valg == "rv":
+        # drop parti_id, frigivelsestidspunkt and godkendelsestidspunkt columns before saving
+        df_kandidater = df_kandidater.drop(columns=["parti_id", "frigivelsestidspunkt", "godkendelsestidspunkt"], errors='ignore')
+
+    gem_resultater(df_kandidater, outdir / f"{valg}25_resultater_kandidater.csv")
+
+    save_state(state_path, fingerprints)
+    return True
+
+# ----------------------------
+# Kandidatdata (03a)
+# ----------------------------
+
+def get_kv_kandidatdata(from_path, to_path, valg, data_type):
+    all_files = kombiner_resultater(from_path, to_path, "kv", "kandidat-data")
+    valgforbund_data = []
+    kandidat_data = []
+
+    for file in all_files:
+        data = load_file(file, KANDIDAT_DATA)
+        try:
+
+            for valgforbund in data['Valgforbund']:
+                valgforbund_data.append({
+                    'kommune': data['Kommune'],
+                    'kommune_dagi_id': data['KommuneDagiId'],
+                    'frigivelsestidspunkt': data['FrigivelsesTidspunktUTC'],
+                    'opdateringstidspunkt': data['OpdateringsTidspunktUTC'],
+                    'valgforbund_navn': valgforbund['Navn'],
+                    'kandidatliste_id': valgforbund['KandidatlisteId']
+                })
+
+        except Exception as e:
+            print(f"Fejl ved læsning af valgforbund i {file}: {e}")
+
+        try:
+            for kandidater in data['Kandidatlister']:
+                for kandidat in kandidater['Kandidater']:
+                    kandidat_data.append({
+                        'kommune': data['Kommune'],
+                        'kommune_dagi_id': data['KommuneDagiId'],
+                        'frigivelsestidspunkt': data['FrigivelsesTidspunktUTC'],
+                        'opdateringstidspunkt': data['OpdateringsTidspunktUTC'],
+                        'parti_stemmeseddelsplacering': kandidater['Stemmeseddelsplacering'],
+                        'parti_navn': kandidater['Navn'],
+                        'parti_bogstav': kandidater['Bogstavbetegnelse'],
+                        'parti_opstillingsform': kandidater['Opstillingsform'],
+                        'kandidatliste_id': kandidater['KandidatlisteId'],
+                        'kandidat_id': kandidat['Id'],
+                        'kandidat_navn': kandidat['Navn'],
+                        'kandidat_stemmeseddelnavn': kandidat['Stemmeseddelnavn'],
+                        'kandidat_stilling': kandidat['Stilling'],
+                        'kandidat_adresse': kandidat['BopaelPaaStemmeseddel'],
+                    })
+        except Exception as e:
+            print(f"Fejl ved læsning af {file}: {e}")
+
+    return kandidat_data, valgforbund_data
+
+# Slå partinavn og -bogstav op for partierne i hvert valgforbund. Valgforbundenes kandidatliste-id'er foldes ud til én
+# række per id og merges med én række per kandidatliste, så hvert id kun slås op én gang
+def tilføj_valgforbund_partier(df_valgforbund_data, df_kandidat_data):
+    er_liste = df_valgforbund_data["kandidatliste_id"].map(lambda ids: isinstance(ids, list))
+    for _ in range((~er_liste).sum()):
+        print("No list available")
+
+    lister = df_kandidat_data.drop_duplicates("kandidatliste_id")[["kandidatliste_id", "parti_navn", "parti_bogstav"]]
+    ids = df_valgforbund_data.loc[er_liste, ["kandidatliste_id"]].explode("kandidatliste_id").dropna()
+    ids = ids.rename_axis("valgforbund").reset_index().merge(lister, on="kandidatliste_id", how="left", indicator=True)
+    for id in ids.loc[ids["_merge"] == "left_only", "kandidatliste_id"]:
+        print(f"ID: {id} not found in df_kandidat_data")
+
+    # Partierne i samme rækkefølge som id'erne. Valgforbund, hvor intet id blev fundet, får en tom liste, og
+    # valgforbund uden en liste af id'er en tom streng
+    fundne = ids[ids["_merge"] == "both"].groupby("valgforbund", sort=False)[["parti_navn", "parti_bogstav"]].agg(list)
+    for kolonne, fra in (("valgforbund_partier", "parti_navn"), ("valgforbund_partibogstav", "parti_bogstav")):
+        partier = fundne[fra].to_dict()
+        df_valgforbund_data[kolonne] = pd.Series(
+            [partier.get(i, []) if liste else "" for i, liste in zip(df_valgforbund_data.index, er_liste)],
+            index=df_valgforbund_data.index, dtype=object,
+        )
+    return df_valgforbund_data
+
+def strukturer_kandidatdata(from_path=FROM_PATH, to_path=TO_PATH):
+    """Write kv25_kandidat_data.csv and kv25_valgforbund_data.csv from the raw kandidat-data files."""
+    data = get_kv_kandidatdata(from_path, to_path, "kv", "kandidat-data")
+    df_kandidat_data = pd.DataFrame(data[0])
+    df_valgforbund_data = tilføj_valgforbund_partier(pd.DataFrame(data[1]), df_kandidat_data)
+
+    for df, file in ((df_kandidat_data, "kv25_kandidat_data.csv"), (df_valgforbund_data, "kv25_valgforbund_data.csv")):
+        for col in ("opdateringstidspunkt", "frigivelsestidspunkt"):
+            df[col] = parse_tidspunkter(df[col])
+        skriv_csv(df, os.path.join(to_path, "kv", "kandidat-info", file))
+
+# ----------------------------
+# Mandater (04)
+# ----------------------------
+
+def get_mandater(from_path=FROM_PATH, to_path=TO_PATH, folder=FOLDERS, valg="kv"):
+    mandat_folder = folder[1]  # "verifikation/mandatfordeling"
+    filer = glob.glob(os.path.join(from_path, valg, mandat_folder, "*.json"))
+    valg_dir = os.path.join(from_path, valg)
+    index = load_index(valg_dir)
+
+    mandater = []
+
+    for file in filer:
+        try:
+            data = read_verified(file, valg_dir, index, MANDATFORDELING)
+        except SchemaFejl as e:
+            raise SchemaFejl(f"{file}: {e}") from e
+        except Exception as e:
+            print(f"Error reading {file}: {e}")
+            continue
+        if data is None:
+            continue
+
+
+        if valg == "rv":
+            base = {
+                "valgart": data.get("Valgart"),
+                "region": data.get("Region"),
+                "region_dagi_id": data.get("RegionDagiId"),
+                "resultat_art": data.get("Resultatart"),
+                "frigivelsestidspunkt": data.get("FrigivelsesTidspunktUTC"),
+            }
+        else:  # valg == "kv"
+            base = {
+                "valgart": data.get("Valgart"),
+                "kommune": data.get("Kommune"),
+                "kommune_kode": data.get("Kommunekode"),
+                "resultat_art": data.get("Resultatart"),
+                "frigivelsestidspunkt": data.get("FrigivelsesTidspunktUTC"),
+            }
+
+
+        # the mandater is either in the key "Personlige Mandater" or "Listemandater"
+        for mandat_type in ["PersonligeMandater", "ListeMandater"]:
+            for mandat in data.get(mandat_type) or []:
+                mandater.append({
+                    **base,
+                    "nummer" : mandat.get("Nummer"),
+                    "mandat_type": mandat_type,
+                    "kandidat": mandat.get("Stemmeseddelnavn", None),
+                    "kandidat_id": mandat.get("KandidatId", None),
+                    "parti": mandat.get("KandidatlisteNavn"),
+                    "parti_id": mandat.get("KandidatlisteId"),
+                    "parti_bogstav": mandat.get("Bogstavbetegnelse"),
+                })
+    return mandater
+
+def strukturer_mandater():
+    """Write kv25_mandater.csv and rv25_mandater.csv. Returns True if any mandate file had changed."""
+    # Brug hash-indekset til at se, om nogen mandatfiler har ændret sig siden sidste kørsel
+    states = {}
+    for valg in ["kv", "rv"]:
+        valg_dir = os.path.join(FROM_PATH, valg)
+        state_path = Path(TO_PATH) / valg / STATE_FILE.format(FOLDERS[1])
+        filer = glob.glob(os.path.join(valg_dir, FOLDERS[1], "*.json"))
+        fingerprints, changed = changed_files(filer, valg_dir, load_index(valg_dir), load_state(state_path))
+        if changed or not (Path(TO_PATH) / valg / f"{valg}25_mandater.csv").exists():
+            states[state_path] = fingerprints
+
+    if not states:
+        print("No changed mandate files since last run, nothing to structure.")
+        return False
+
+    for valg in ["kv", "rv"]:
+        df_mandater = pd.DataFrame(get_mandater(FROM_PATH, TO_PATH, FOLDERS, valg))
+        # Frigivelsestidspunktet parses som i de andre tabeller og skrives i samme format (ISO, UTC)
+        if "frigivelsestidspunkt" in df_mandater:
+            df_mandater["frigivelsestidspunkt"] = parse_tidspunkter(df_mandater["frigivelsestidspunkt"])
+        outdir = Path(TO_PATH) / valg
+        outdir.mkdir(parents=True, exist_ok=True)
+        skriv_csv(df_mandater, outdir / f"{valg}25_mandater.csv")
+
+    for state_path, fingerprints in states.items():
+        save_state(state_path, fingerprints)
+    return True
@@ -0,0 +1,133 @@
+import os
+from pathlib import Path
+
+import pandas as pd
+
+from config import FROM_PATH, TO_PATH, FOLDERS, CACHE_PATH, OMRAADE_TILSTAND
+from hash_index import load_index, index_key, fingerprint, load_state, save_state
+from helper_functions import kombiner_resultater, iter_valgresultater
+from parse_cache import open_cache
+from kvrv.refdata import load_refdata
+from kvrv.skema import parse_tidspunkter
+
+# Tilstandstabel over afstemningsområderne: for hvert område den seneste resultat_art, frigivelsestidspunkt og
+# indholds-hash. 02a/02b lægger kun de rå filer ind, hvis hash har ændret sig, og 05a/05b slår optællingen op her
+# i stedet for at tælle i hele resultattabellen. Der kan ligge flere filer for samme område (fx gamle testfiler
+# med et andet navn), så området får felterne fra filen med det seneste frigivelsestidspunkt.
+
+FÆRDIGE_ARTER = ["Fintælling", "ForeløbigOptælling"]
+# Felterne fra en fils base-kolonner (se parse_valgresultat), der gemmes i tabellen. region findes kun for RV
+FELTER = ["afstemningsområde_dagi_id", "kommune_kode", "region", "resultat_art", "frigivelsestidspunkt"]
+
+class Områdetilstand:
+    """State of every afstemningsområde, kept in data/struktureret/<valg>/OMRAADE_TILSTAND.
+
+        filer     index key of a raw file -> its content hash and FELTER
+        områder   afstemningsområde_dagi_id -> FELTER, hash and file of its latest release
+        ændrede   the districts that changed at the last update
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        state = load_state(self.path) or {}
+        self.filer = state.get("filer", {})
+        self.områder = state.get("områder", {})
+        self.ændrede = state.get("ændrede", [])
+        self._fremdrift = {}
+
+    def forældede(self, fingerprints) -> list[str]:
+        """The files in fingerprints ({index key: content hash}) that are new or changed since they were added."""
+        return [key for key, fp in fingerprints.items() if self.filer.get(key, {}).get("hash") != fp]
+
+    def opdater(self, fingerprints, baser) -> list[int]:
+        """Add the base fields of new or changed files ({index key: base}) and drop the files that are gone.
+
+        Only the districts of those files are looked at again. Returns (and keeps in ændrede)
+        the districts whose latest release changed.
+        """
+        berørte = {self.filer.pop(key)["afstemningsområde_dagi_id"] for key in list(self.filer) if key not in fingerprints}
+        # Tidspunkterne gemmes i ISO 8601 (UTC), så de kan sammenlignes som tekst
+        tider = parse_tidspunkter(pd.Series([base.get("frigivelsestidspunkt") for base in baser.values()], dtype=object))
+        for (key, base), tid in zip(baser.items(), tider):
+            felter = {felt: base[felt] for felt in FELTER if felt in base}
+            felter["frigivelsestidspunkt"] = None if pd.isna(tid) else tid.isoformat()
+            self.filer[key] = {"hash": fingerprints[key], **felter}
+            berørte.add(felter["afstemningsområde_dagi_id"])
+        berørte.discard(None)
+
+        # Den seneste fil for hvert berørt område (filnavnet afgør, hvis tidspunktet er det samme)
+        seneste = {}
+        for key, fil in self.filer.items():
+            dagi_id = fil["afstemningsområde_dagi_id"]
+            if dagi_id in berørte:
+                rang = (fil["frigivelsestidspunkt"] or "", key)
+                if dagi_id not in seneste or rang > seneste[dagi_id]:
+                    seneste[dagi_id] = rang
+
+        ændrede = []
+        for dagi_id in sorted(berørte):
+            gammel = self.områder.pop(str(dagi_id), None)
+            ny = None
+            if dagi_id in seneste:
+                key = seneste[dagi_id][1]
+                ny = self.områder[str(dagi_id)] = {**self.filer[key], "fil": key}
+            if ny != gammel:
+                ændrede.append(dagi_id)
+        self.ændrede = ændrede
+        self._fremdrift = {}
+        return ændrede
+
+    def fremdrift(self, nøgle) -> pd.DataFrame:
+        """Counting per kommune_kode/region, aggregated once per nøgle: optalte, alle and færdig (all districts counted)."""
+        if nøgle not in self._fremdrift:
+            områder = pd.DataFrame(list(self.områder.values()), columns=FELTER)
+            self._fremdrift[nøgle] = (
+                områder
+                  .assign(færdig=områder["resultat_art"].isin(FÆRDIGE_ARTER))
+                  .groupby(nøgle)
+                  .agg(optalte=("færdig", "sum"), alle=("færdig", "size"), færdig=("færdig", "all"))
+            )
+        return self._fremdrift[nøgle]
+
+    def optalte(self) -> int:
+        return sum(område["resultat_art"] in FÆRDIGE_ARTER for område in self.områder.values())
+
+    def gem(self):
+        save_state(self.path, {"filer": self.filer, "områder": self.områder, "ændrede": self.ændrede})
+
+def opdater_tilstand(valg, refdata=None, from_path=FROM_PATH, to_path=TO_PATH) -> Områdetilstand:
+    """Bring the state table of one election up to date with the raw result files and save it.
+
+    Only files whose content hash is new are read, from the parse cache when 02a/02b have
+    already parsed them. Files that cannot be read are left out and tried again next time.
+    """
+    valg_dir = os.path.join(from_path, valg)
+    index = load_index(valg_dir)
+    files = kombiner_resultater(from_path, to_path, valg, FOLDERS[0])
+    fingerprints = {index_key(file, valg_dir): fingerprint(file, valg_dir, index) for file in files}
+
+    tilstand = Områdetilstand(Path(to_path) / valg / OMRAADE_TILSTAND)
+    forældede = tilstand.forældede(fingerprints)
+    if tilstand.path.exists() and not forældede and fingerprints.keys() == tilstand.filer.keys():
+        return tilstand
+
+    cache = open_cache(os.path.join(CACHE_PATH, valg, FOLDERS[0]))
+    # Regionen kommer fra kommunekoden, ligesom i 02b
+    regioner = (load_refdata() if refdata is None else refdata).region if valg == "rv" else None
+    baser = {}
+    for key in forældede:
+        for chunk in iter_valgresultater([os.path.join(valg_dir, key)], valg_dir, index, cache, regioner):
+            baser[key] = chunk["base"]
+
+    ændrede = tilstand.opdater(fingerprints, baser)
+    tilstand.gem()
+    print(f"{len(ændrede)} afstemningsområder changed since last run ({tilstand.optalte()} of {len(tilstand.områder)} counted)")
+    return tilstand
+
+def læs_tilstand(valg, refdata=None, to_path=TO_PATH) -> Områdetilstand:
+    """The state table written by 02a/02b, or built from the raw files if there is none yet."""
+    path = Path(to_path) / valg / OMRAADE_TILSTAND
+    if path.exists():
+        return Områdetilstand(path)
+    print(f"No {path}, building it from the raw result files")
+    return opdater_tilstand(valg, refdata, to_path=to_path)
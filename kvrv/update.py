@@ -0,0 +1,664 @@
+import io
+from abc import ABC, abstractmethod
+from pathlib import Path
+
+import pandas as pd
+import requests
+
+from config import TO_PATH, AENDREDE_FILER, BORGMESTRE, REGIONS_FPS, STREAM_KANDIDATER
+from generate_pop_ups import add_popups
+from helper_functions import ÆndredeFiler
+from kvrv.kandidater import kandidatstemmer
+from kvrv.kube import Kube
+from kvrv.refdata import RefData, load_refdata
+from kvrv.skema import læs_resultater
+from kvrv.tilstand import læs_tilstand
+
+# Opdatering af datafilerne bag visualiseringerne (tidligere 05a/05b). KV og RV kører gennem samme motor, opdater(),
+# og alt, hvad der er forskelligt mellem de to valg (kommune eller region, filnavne, statusopslaget), er samlet
+# i en Geografi: KOMMUNER og REGIONER. opdater_alle() kører begge valg i samme proces med fælles partiindeks.
+# Alle stemmetal (per afstemningsområde, kommune, region og nationalt) udregnes én gang i en Kube (kvrv/kube.py),
+# og funktionerne her læser kun udsnit af den.
+
+# ----------------------------
+# Load af datafiler
+# ----------------------------
+
+def rens_kommunenavn(kommune: pd.Series) -> pd.Series:
+    # "Aarhus Kommune" -> "Aarhus", "Bornholms Regionskommune" -> "Bornholm", "Københavns Kommune" -> "København"
+    if isinstance(kommune.dtype, pd.CategoricalDtype):
+        # Kommunen er en kategori (kvrv/skema.py), så kun de unikke navne skal renses
+        navne = kommune.cat.categories.to_series()
+        return kommune.map(dict(zip(navne, rens_kommunenavn(navne))))
+    kommune = kommune.str.replace(" Kommune", "", regex=False)
+    kommune = kommune.str.replace("s Regionskommune", "", regex=False)
+    kommune = kommune.str.replace("Københavns Kommune", "Københavns", regex=False)
+    return kommune.str.replace("Københavns", "København", regex=False)
+
+def hent_borgmestre(url=BORGMESTRE) -> pd.DataFrame:
+    # Hent borgmestre fra google sheets for opdatering af statusfiler
+    return pd.read_csv(url)
+
+def hent_regionsforpersoner(url=REGIONS_FPS) -> pd.DataFrame:
+    # Hent regionsforpersoner fra google sheets for opdatering af statusfiler
+    print("Fetching regions CSV from:", url, flush=True)
+
+    resp = requests.get(url, allow_redirects=True)
+    try:
+        resp.raise_for_status()
+    except requests.HTTPError as e:
+        print("Failed to fetch regions CSV")
+        print("Status code:", resp.status_code)
+        print("Response snippet:", resp.text[:500])
+        raise
+
+    # Try to read with proper encoding, fallback to fixing encoding issues
+    try:
+        regionsforpersoner = pd.read_csv(io.StringIO(resp.text), encoding='utf-8')
+    except:
+        regionsforpersoner = pd.read_csv(io.StringIO(resp.text))
+
+    # Fix encoding issues in region names (e.g., "Ã\x98stdanmark" -> "Østdanmark")
+    if "region" in regionsforpersoner.columns:
+        regionsforpersoner["region"] = regionsforpersoner["region"].apply(fix_encoding)
+    return regionsforpersoner
+
+def fix_encoding(text):
+    if pd.isna(text):
+        return text
+    text_str = str(text)
+    # Try to fix double-encoded UTF-8
+    try:
+        # If it's double-encoded, encode as latin1 then decode as utf-8
+        if 'Ã' in text_str or '\x98' in text_str:
+            return text_str.encode('latin1').decode('utf-8')
+    except:
+        pass
+    return text_str
+
+def find_regionsforperson(regionsforpersoner: pd.DataFrame, regionnavn: str):
+    """Return the formand of the region, matching with or without the "Region " prefix, or None."""
+    region_full = f"Region {regionnavn}"
+
+    # Try exact match first
+    for navn in (regionnavn, region_full):
+        if navn in regionsforpersoner["region"].values:
+            return regionsforpersoner.loc[regionsforpersoner["region"] == navn, "formand"].iat[0]
+
+    # Try case-insensitive and normalized matching
+    region_normalized = regionnavn.lower().strip()
+    region_full_normalized = region_full.lower().strip()
+
+    for idx, df_region in enumerate(regionsforpersoner["region"].values):
+        df_region_normalized = str(df_region).lower().strip() if pd.notna(df_region) else ""
+        # Remove "Region " prefix for comparison
+        df_region_no_prefix = df_region_normalized.replace("region ", "")
+
+        if (region_normalized == df_region_normalized or
+            region_normalized == df_region_no_prefix or
+            region_full_normalized == df_region_normalized):
+            regionsforperson = regionsforpersoner.iloc[idx]["formand"]
+            if pd.notna(regionsforperson):
+                return regionsforperson
+    return None
+
+# ----------------------------
+# Geografierne
+# ----------------------------
+
+class Geografi(ABC):
+    """What differs between the KV (kommuner) and RV (regioner) data files.
+
+    opdater() splits the results by the `nøgle` column and writes one set of files per
+    value. The attributes and methods here say what the files are called, which columns
+    they keep and how the status file is filled in. A subclass has to implement the
+    abstract methods, or it cannot be instantiated.
+    """
+
+    valg = None
+    niveau = None          # niveauet i kuben, der skrives filer for
+    nøgle = None           # kolonnen, resultaterne deles op efter (én kommune-/regionsfil per værdi)
+    nøgle_21 = None        # kolonnen med samme nøgle i 2021-resultaterne
+    geo_kolonner = None    # navne- og id-kolonner for kommunen/regionen. Den første er navnet
+    geo_mappe = None       # undermappen med kommune-/regionsfilerne
+    antal = None           # antal kommuner/regioner, til "ud af" i nationalt/status.csv
+    afst_index = None      # kolonnerne, der beskriver et afstemningsområde i resultaterne
+    afst_kolonner = None   # kolonnerne fra afstemningsstedsfilen, der beholdes (i den rækkefølge)
+    drop_kolonner = None   # kolonner, der fjernes fra kommune-/regionsfilen
+    andre_bogstav = None   # partiet, der lægges ind under "Andre" i nationalt_partier.csv
+    status_kolonner = None # kolonnerne i statusfilen: optalte afstemningssteder og borgmester/regionsformand
+    ark_kolonne = None     # kolonnen i det håndholdte ark, der er udfyldt, når posten er afgjort
+    fundet_kolonne = None  # kolonnen i nationalt/status.csv med antallet af afgjorte poster
+    kort_kandidatnavn = False # skær kandidatnavnet af ved første komma i stemmetalsfilerne
+
+    def __init__(self, valg_path=None):
+        self.valg_path = Path(valg_path or Path(TO_PATH) / self.valg)
+        self.base_path = self.valg_path / "valgresultater"
+
+    @property
+    def navn_kolonne(self):
+        return self.geo_kolonner[0]
+
+    def rens(self, df):
+        return df
+
+    def forbered(self, partier):
+        return partier
+
+    def load_21(self):
+        return pd.read_csv(f"data/21_resultater/{self.valg}21_parti_resultater.csv")
+
+    @abstractmethod
+    def hent_ark(self):
+        """The hand-kept sheet with borgmestre/regionsforpersoner."""
+
+    @abstractmethod
+    def navn(self, nøgle, rå_navn):
+        """The name used in file names and messages, from the key and the name in the results."""
+
+    @abstractmethod
+    def prefix(self, nøgle, navn):
+        """The prefix of the kommune/region's file names."""
+
+    @abstractmethod
+    def geo_fil(self, prefix):
+        """The file name of the kommune/region file."""
+
+    def læs_afst(self, path):
+        return pd.read_csv(path, sep=";")
+
+    def resultater_21(self, resultater_21, navn):
+        """The 2021 results of one kommune/region, or None to skip the 2021 merge."""
+        return resultater_21
+
+    @abstractmethod
+    def valgt(self, nøgle, navn, ark, refdata):
+        """The borgmester/regionsformand for the status file."""
+
+    def nationale_navne(self, navne):
+        return navne
+
+class Kommuner(Geografi):
+    valg = "kv"
+    niveau = "kommune"
+    nøgle = "kommune_kode"
+    nøgle_21 = "kommune_id"
+    geo_kolonner = ["kommune", "kommune_kode"]
+    geo_mappe = "kommune"
+    antal = 98
+    afst_index = ["kommune", "kommune_kode", "afstemningsområde_dagi_id", "afstemningsområde", "resultat_art"]
+    afst_kolonner = [
+        "dagi_id",
+        "navn",
+        "nummer",
+        "afstemningssted_navn",
+        "kommune_id",
+        "opstillingskreds_nummer",
+        "opstillingskreds_dagi_id",
+        "afstemningssted_adresse",
+        "kommune_navn",
+        "kommune_dagi_id",
+    ]
+    drop_kolonner = ["stemmer_25", "stemmer_21", "kommune_id", "kommune_dagi_id", "kommune_navn"]
+    andre_bogstav = "L"
+    status_kolonner = ["Optalte valgsteder", "Borgmester"]
+    ark_kolonne = "borgmester"
+    fundet_kolonne = "Borgmestre fundet"
+    kort_kandidatnavn = True
+
+    def rens(self, df):
+        df["kommune"] = rens_kommunenavn(df["kommune"])
+        return df
+
+    def forbered(self, partier):
+        # I København stiller R op som KP. parti_bogstav er en kategori (kvrv/skema.py), så KP skal være en af kategorierne
+        if "KP" not in partier["parti_bogstav"].cat.categories:
+            partier["parti_bogstav"] = partier["parti_bogstav"].cat.add_categories("KP")
+        partier.loc[(partier["kommune_kode"] == 101) & (partier["parti_bogstav"] == "R"), "parti_bogstav"] = "KP"
+        return partier
+
+    def hent_ark(self):
+        return hent_borgmestre()
+
+    def navn(self, nøgle, rå_navn):
+        return rå_navn.replace(" Kommune", "")
+
+    def prefix(self, nøgle, navn):
+        return f"{nøgle}_{navn.lower()}"
+
+    def geo_fil(self, prefix):
+        return f"{prefix}_kommune.csv"
+
+
+    def valgt(self, nøgle, navn, ark, refdata):
+        # Find borgmesteren for kommunen, hvis det er afgjort
+        if nøgle not in ark["kommune_kode"].values:
+            return "Ikke afgjort"
+        række = ark.loc[ark["kommune_kode"] == nøgle].iloc[0]
+        borgmester, borgmester_parti = række["borgmester"], række["borgmesterparti"]
+
+        # Find partibogstavet. Mangler borgmesteren eller partiet, er det ikke afgjort
+        if pd.isna(borgmester_parti) or pd.isna(borgmester):
+            return "Ikke afgjort"
+        bogstav = refdata.navn_bogstav.get(borgmester_parti)
+        if bogstav is None:
+            return "Ikke afgjort"
+        return str(borgmester) + f" ({bogstav})"
+
+class Regioner(Geografi):
+    valg = "rv"
+    niveau = "region"
+    nøgle = "region"
+    nøgle_21 = "region"
+    geo_kolonner = ["region"]
+    geo_mappe = "region"
+    antal = 4
+    afst_index = ["region", "afstemningsområde_dagi_id", "afstemningsområde", "resultat_art"]
+    afst_kolonner = [
+        "dagi_id",
+        "region",
+        "navn",
+        "nummer",
+        "afstemningssted_navn",
+        "opstillingskreds_nummer",
+        "opstillingskreds_dagi_id",
+        "afstemningssted_adresse",
+    ]
+    drop_kolonner = ["stemmer_25", "stemmer_21", "region_navn"]
+    andre_bogstav = "P"
+    status_kolonner = ["Optalte afstemningssteder", "Regionsformand"]
+    ark_kolonne = "formand"
+    fundet_kolonne = "Regionsformænd fundet"
+
+    def load_21(self):
+        resultater_21 = super().load_21()
+        resultater_21["region"] = resultater_21["region"].str.replace("Region ", "")
+        return resultater_21
+
+    def hent_ark(self):
+        return hent_regionsforpersoner()
+
+    def navn(self, nøgle, rå_navn):
+        return nøgle.replace("Region ", "")
+
+    def prefix(self, nøgle, navn):
+        return navn.lower()
+
+    def geo_fil(self, prefix):
+        return f"{prefix}.csv"
+
+    def læs_afst(self, path):
+        try:
+            return pd.read_csv(path)
+        except:
+            return pd.read_csv(path, sep=";")
+
+    def resultater_21(self, resultater_21, navn):
+        # Region Østdanmark fandtes ikke i 2021
+        if navn == "Østdanmark":
+            print("Skipping 2021 merge for", navn)
+            return None
+        return resultater_21
+
+    def valgt(self, nøgle, navn, ark, refdata):
+        regionsforperson = find_regionsforperson(ark, navn)
+        return "Ikke afgjort" if regionsforperson is None else regionsforperson
+
+    def nationale_navne(self, navne):
+        return navne.apply(lambda x: f"Region {x}")
+
+KOMMUNER = Kommuner()
+REGIONER = Regioner()
+
+# ----------------------------
+# Funktion til at standardisere partinavne
+# ----------------------------
+
+def _standardize_party_labels(df: pd.DataFrame, refdata: RefData) -> pd.DataFrame:
+    """Map to Altinget party names/letters based on config."""
+    df["parti"] = df["parti_bogstav"].map(refdata.listebogstav_navn).fillna(df["parti_bogstav"])
+    df["bogstav"] = df["parti_bogstav"].map(refdata.listebogstav_bogstav).fillna(df["parti_bogstav"])
+    return df
+
+# ----------------------------
+# Centrale funktioner
+# ----------------------------
+
+def load_resultater(geo: Geografi, tabel: str) -> pd.DataFrame:
+    """Read one structured result table ("partier" or "kandidater", typed, see kvrv/skema.py) without the rows without results."""
+    df = geo.rens(læs_resultater(geo.valg_path / f"{geo.valg}25_resultater_{tabel}.csv"))
+
+    # remove rows where resultat_art is IngenResultater
+    return df.query("resultat_art != 'IngenResultater'")
+
+# Funktionen udregner hvor mange procent af stemmerne, hvert parti har fået i kommunen/regionen, og merger med resultaterne fra 2021
+def get_overall_percentages(
+    parti_stemmer: pd.DataFrame,
+    gyldige_total: float,
+    geo_df: pd.DataFrame,
+    resultater_21: pd.DataFrame | None,
+    navn: str,
+    geo: Geografi,
+) -> pd.DataFrame:
+    """Compute kommune/region-level percentages and merge 2021."""
+    # Udregn hvor mange procent af stemmerne, hvert parti har fået
+    parti_sum = (
+        parti_stemmer
+        .assign(procent_25=lambda x: x["stemmer"] / gyldige_total * 100)
+        .rename(
+            columns={
+                "stemmer": "stemmer_25",
+                "parti": "partier",
+                "parti_bogstav": "listebogstav",
+            }
+        )[["partier", "bogstav", "listebogstav", "procent_25"]]
+    )
+
+    # Join resultaterne med filen for kommunen/regionen
+    df = (
+        pd.concat([geo_df, parti_sum], ignore_index=True)
+        .dropna(subset=["partier", "procent_25"])
+        .drop_duplicates(subset=["bogstav", "listebogstav", "partier"], keep="last")
+    )
+
+    # Hvis filen allerede har 2021 resultater, så spring merge over
+    if resultater_21 is None:
+        pass
+    elif "procent_21" in df.columns and df["procent_21"].notna().any():
+        print("2021 results already present for", navn)
+    else:
+        # For en sikkerheds skyld, fjern gamle 2021 kolonner hvis de findes
+        df = df.drop(columns=["procent_21", "stemmer_21"], errors="ignore")
+
+        # Merge 2021 resultaterne ind i dataframe
+        resultater_21 = resultater_21[["partier", "bogstav", "procent_21"]].drop_duplicates(subset=["partier", "bogstav"])
+        df = df.merge(resultater_21, on=["partier", "bogstav"], how="left")
+        print("merged 2021 results for", navn)
+
+    # Ændr kolonne rækkefølge og drop ubrugte kolonner
+    first_cols = ["bogstav", "procent_25", "procent_21"]
+    df = df[first_cols + [c for c in df.columns if c not in first_cols]]
+    return df.drop(columns=geo.drop_kolonner, errors="ignore")
+
+# Funktionen udregner procenter per afstemningsområde og finder største parti
+def get_afstemningsområde_percentages(wide: pd.DataFrame, afst: pd.DataFrame, geo: Geografi, refdata: RefData) -> pd.DataFrame:
+    """Add the largest party to the per-polling-district percentages (one column per party) and merge with afst."""
+    wide = wide.copy()
+
+    # Find det største parti per afstemningsområde (kolonnenavnet med den største værdi per række)
+    party_cols = wide.columns.difference(geo.afst_index)
+    wide["største_parti"] = wide[party_cols].idxmax(axis=1)
+
+    # replace største parti bogstav with party name
+    wide["største_parti"] = wide["største_parti"].map(refdata.bogstav_navn).fillna(wide["største_parti"])
+
+    # Merge med afstemningssteds-info
+    afst = afst[geo.afst_kolonner].merge(
+        wide.drop(columns=[c for c in geo.geo_kolonner if c in geo.afst_kolonner]),
+        left_on="dagi_id",
+        right_on="afstemningsområde_dagi_id",
+        how="left",
+    )
+
+    # Drop unødvendige kolonner og ændr kolonne rækkefølge
+    afst = afst.drop(
+        columns=["afstemningsområde_dagi_id", "afstemningsområde", "kommune", "kommune_kode"],
+        errors="ignore",
+    )
+    first_cols = geo.afst_kolonner + ["resultat_art"]
+    afst = afst[first_cols + [c for c in afst.columns if c not in first_cols]]
+
+    return add_popups(afst)
+
+# Funktionen kombinerer data fra kombit og vores håndholdte borgmester-/regionsforpersondata til statusfilen
+def get_status(
+    summary_df: pd.DataFrame,
+    nøgle,
+    navn: str,
+    fremdrift: tuple[int, int],
+    ark: pd.DataFrame,
+    geo: Geografi,
+    refdata: RefData,
+) -> pd.DataFrame:
+    """Return the status table: counted districts (from the state table, kvrv/tilstand.py) and borgmester/regionsformand."""
+    optalte, alle = fremdrift
+    optalte_kolonne, valgt_kolonne = geo.status_kolonner
+    summary_df[optalte_kolonne] = f"{optalte} ud af {alle}"
+    summary_df[valgt_kolonne] = geo.valgt(nøgle, navn, ark, refdata)
+
+    return summary_df[geo.status_kolonner]
+
+# Funktionen udregner kandidaternes personlige stemmetal per kommune/region og nationalt
+def get_stemmetal(stemmer: pd.DataFrame, geo: Geografi, refdata: RefData) -> dict[str, pd.DataFrame]:
+    """Return {path relative to valgresultater/: table} for every kommune/region and the national candidate file."""
+    stemmer = stemmer.groupby(['kandidat','parti','parti_bogstav'] + geo.geo_kolonner).stemmer.sum().reset_index()
+    stemmer['parti'] = stemmer['parti_bogstav'].map(refdata.listebogstav_navn).fillna(stemmer['parti_bogstav']) # standardiser partinavne
+    stemmer = stemmer[['kandidat','parti', geo.navn_kolonne,'stemmer'] + geo.geo_kolonner[1:]]
+
+    # if there is a , in kandidat only keep the part before the ,
+    if geo.kort_kandidatnavn:
+        stemmer['kandidat'] = stemmer['kandidat'].str.split(',').str[0]
+
+    # sorter efter antal stemmer. Kandidater med lige mange stemmer sorteres efter navn og parti, så rækkefølgen i en
+    # kommunes fil ikke afhænger af resultaterne i de andre kommuner (ellers skrives og publiceres filen igen)
+    stemmer = stemmer.sort_values(by=['stemmer', 'kandidat', 'parti'], ascending=[False, True, True], kind='stable')
+
+    # Resultater per kommune/region
+    filer = {}
+    for navn, geo_stemmer in stemmer.groupby(geo.navn_kolonne, sort=False):
+        prefix = geo.prefix(geo_stemmer[geo.nøgle].iat[0], navn)
+        filer[f"kandidater/{prefix}_stemmetal_kandidater.csv"] = geo_stemmer.drop(columns=geo.geo_kolonner)
+
+    # Og nationalt
+    filer["nationalt/stemmetal_kandidater.csv"] = stemmer.drop(columns=geo.geo_kolonner[1:])
+    return filer
+
+def get_nationalt_kort(parti_stemmer: pd.DataFrame, navne: pd.Series, færdige, geo: Geografi) -> pd.DataFrame:
+    """Party percentages per kommune/region for the national map, only where everything is counted."""
+    # procent af partistemmerne i kommunen/regionen, og det største parti
+    nat_resultater = (
+        parti_stemmer
+          .groupby([geo.nøgle, "parti", "bogstav"], as_index=False)["stemmer"].sum()
+          .assign(**{geo.navn_kolonne: lambda d: d[geo.nøgle].map(navne)})
+    )
+    totals = nat_resultater.groupby(geo.navn_kolonne)["stemmer"].transform("sum")
+    nat_resultater["procent_25"] = nat_resultater["stemmer"] / totals * 100
+
+    største = (
+        nat_resultater
+          .sort_values([geo.navn_kolonne, "procent_25", "parti"], ascending=[True, False, True], kind="stable")
+          .drop_duplicates(geo.navn_kolonne)[[geo.navn_kolonne, "parti"]]
+          .rename(columns={"parti": "største_parti"})
+    )
+
+    nat_resultater = (
+        nat_resultater
+          .merge(største, on=geo.navn_kolonne, how="left")
+          .pivot_table(
+              index=[geo.navn_kolonne, "største_parti"],
+              columns="bogstav",
+              values="procent_25",
+              aggfunc="max",
+          )
+          .reset_index()
+    )
+    nat_resultater[geo.navn_kolonne] = geo.nationale_navne(nat_resultater[geo.navn_kolonne])
+
+    # only keep the kommuner/regioner where all the results are in
+    færdige = geo.nationale_navne(pd.Series(færdige, dtype=object))
+    print(f"Completed ({geo.geo_mappe}):", len(færdige))
+    nat_resultater = nat_resultater[nat_resultater[geo.navn_kolonne].isin(færdige)]
+    return add_popups(nat_resultater)
+
+def get_nationale_partier(parti_stemmer: pd.DataFrame, resultater_21_partier: pd.DataFrame, geo: Geografi, refdata: RefData) -> pd.DataFrame:
+    """National percentages per party with 2021, parties under 0.5 percent grouped as "Andre"."""
+    bogstav_map = refdata.listebogstav_bogstav
+
+    # now get the percent per party across the whole country
+    national_totals = (
+        parti_stemmer
+          .groupby(["parti", "parti_bogstav"], as_index=False)["stemmer"].sum()
+          .assign(
+              total_stemmer=lambda d: d["stemmer"].sum(),
+              procent_25=lambda d: d["stemmer"] / d["total_stemmer"] * 100,
+          )
+          .rename(columns={"stemmer": "stemmer_25"})
+          [["parti", "parti_bogstav", "stemmer_25", "procent_25"]]
+    )
+
+    # get the 2021 results too
+    national_21 = (
+        resultater_21_partier
+          .groupby(["partier", "listebogstav"], as_index=False)["stemmer_21"].sum()
+          .assign(
+              total_stemmer=lambda d: d["stemmer_21"].sum(),
+              procent_21=lambda d: d["stemmer_21"] / d["total_stemmer"] * 100,
+          )
+          [["partier", "listebogstav", "stemmer_21", "procent_21"]]
+    )
+
+    national_totals = (
+        national_totals
+          .merge(
+              national_21,
+              left_on=["parti", "parti_bogstav"],
+              right_on=["partier", "listebogstav"],
+              how="left",
+          )
+          .drop(columns=["partier", "listebogstav","stemmer_25","stemmer_21"])
+    )
+
+    national_totals["bogstav"] = national_totals["parti_bogstav"].map(bogstav_map).fillna(national_totals["parti_bogstav"]) # get the bogstavs too
+    national_totals = national_totals[["bogstav", "parti", "procent_25", "procent_21"]] # reorder columns
+
+    # group parties with less than 0.5 percent into "Andre"
+    minor_parties_mask = national_totals["procent_25"] < 0.5
+    andre_row = pd.DataFrame({
+        "bogstav": ["Andre"],
+        "parti": ["Andre"],
+        "procent_25": [national_totals.loc[minor_parties_mask, "procent_25"].sum()],
+        "procent_21": [national_totals.loc[minor_parties_mask, "procent_21"].sum()],
+    })
+
+    # if listebogstav is L, add the percentages of geo.andre_bogstav to andre_row instead of creating a new row
+    if "L" in national_totals["bogstav"].values:
+        andre = national_totals["bogstav"] == geo.andre_bogstav
+        andre_row["procent_25"] += national_totals.loc[andre, "procent_25"].values[0]
+        andre_row["procent_21"] += national_totals.loc[andre, "procent_21"].values[0]
+        minor_parties_mask = minor_parties_mask | andre
+
+    national_totals = pd.concat([
+        national_totals.loc[~minor_parties_mask],
+        andre_row
+    ], ignore_index=True)
+
+    # replace 0 with NaN
+    national_totals["procent_21"] = national_totals["procent_21"].replace(0, pd.NA)
+    return national_totals
+
+# ----------------------------
+# Motoren
+# ----------------------------
+
+def opdater(geo: Geografi, refdata=None, ark=None, stream_kandidater=STREAM_KANDIDATER) -> list[str]:
+    """Update every data file of one election from the structured results. Returns the pending changed files.
+
+    The reference-data indexes (kvrv/refdata.py) and the hand-kept sheet (borgmestre/regionsforpersoner)
+    are loaded if not given. With stream_kandidater the candidate votes are folded from the raw files
+    (kvrv/kandidater.py) instead of read from the candidate table.
+    """
+    base_path = geo.base_path
+    geo_dir, afstem_dir, national_dir = base_path / geo.geo_mappe, base_path / "afstemningssteder", base_path / "nationalt"
+
+    # Alle datafiler skrives kun, hvis indholdet er ændret. De ændrede stier gemmes til publiceringen
+    ændrede_filer = ÆndredeFiler(geo.valg_path / AENDREDE_FILER)
+
+    refdata = load_refdata() if refdata is None else refdata
+    ark = geo.hent_ark() if ark is None else ark
+    # Optællingen per kommune/region udregnes én gang fra tilstandstabellen over afstemningsområderne (skrevet af
+    # 02a/02b) og bruges til statusfilerne og til at finde de færdige kommuner/regioner til det nationale kort
+    tilstand = læs_tilstand(geo.valg, refdata)
+    fremdrift = tilstand.fremdrift(geo.nøgle)
+    print(f"{len(tilstand.ændrede)} afstemningsområder changed at the last structuring run")
+    resultater_21_partier = geo.load_21()
+    # 2021-resultaterne deles op per kommune/region én gang, så loopet kun slår op i en dict
+    resultater_21_per_geo = dict(tuple(resultater_21_partier.groupby(geo.nøgle_21, sort=False)))
+
+    # Resultaterne læses én gang, og partinavnene standardiseres til vores format for alle rækker på én gang
+    partier = load_resultater(geo, "partier")
+    partier = _standardize_party_labels(geo.forbered(partier), refdata)
+
+    # Stemmer per parti og gyldige stemmer på alle niveauer i én omgang
+    kube = Kube(partier, geo.afst_index)
+    rå_navne = partier.drop_duplicates(geo.nøgle).set_index(geo.nøgle, drop=False)[geo.navn_kolonne]
+    navne = {}
+
+    alle = ark[ark[geo.ark_kolonne].notna()].shape[0] # find the number of non empty rows in the sheet
+
+    # Loop over resultaterne fra kommunerne/regionerne og opdater datafilerne
+    for nøgle in partier[geo.nøgle].unique():
+        navn = navne[nøgle] = geo.navn(nøgle, rå_navne[nøgle])
+        prefix = geo.prefix(nøgle, navn)
+
+        # Load filerne, der ligger til grund for visualiseringerne
+        geo_path = geo_dir / geo.geo_fil(prefix)
+        afst_path = afstem_dir / f"{prefix}_afstemningsområde.csv"
+        afstemningssted_niveau = geo.læs_afst(afst_path)
+
+        # Kør funktionerne og opdater vores datafiler
+        geo_df = get_overall_percentages(
+            kube.partier(geo.niveau, nøgle),
+            kube.gyldige[geo.niveau][nøgle],
+            pd.read_csv(geo_path),
+            geo.resultater_21(resultater_21_per_geo.get(nøgle, resultater_21_partier.iloc[:0]), navn),
+            navn,
+            geo,
+        )
+        ændrede_filer.skriv_csv(geo_df, geo_path, index=False)
+
+        afst = get_afstemningsområde_percentages(
+            kube.procent_per_afstemningsområde(geo.niveau, nøgle), afstemningssted_niveau, geo, refdata
+        )
+        ændrede_filer.skriv_csv(afst, afst_path, index=False, sep=";")
+
+        status_path = base_path / "status" / f"{prefix}_status.csv"
+        optalt = tuple(fremdrift.loc[nøgle, ["optalte", "alle"]]) if nøgle in fremdrift.index else (0, 0)
+        status = get_status(pd.read_csv(status_path), nøgle, navn, optalt, ark, geo, refdata)
+        ændrede_filer.skriv_csv(status, status_path, index=False)
+
+        print(f"Updated data files for {navn}")
+
+    # Kandidaternes stemmetal afhænger ikke af kommunen/regionen i loopet, så de udregnes samlet én gang
+    if stream_kandidater:
+        kandidater = kandidatstemmer(geo, refdata)
+    else:
+        kandidater = load_resultater(geo, "kandidater")
+    ændrede_stemmetal = [
+        path for path, df in get_stemmetal(kandidater, geo, refdata).items()
+        if ændrede_filer.skriv_csv(df, base_path / path, index=False)
+    ]
+    print(f"Updated {len(ændrede_stemmetal)} candidate vote files")
+
+    # De nationale filer læser kommune-/regionsniveauet og landsniveauet i kuben
+    færdige = pd.Series(navne).reindex(fremdrift.index[fremdrift["færdig"]]).dropna()
+    nat_kort = get_nationalt_kort(kube.stemmer[geo.niveau], pd.Series(navne), færdige, geo)
+    ændrede_filer.skriv_csv(nat_kort, national_dir / "nationalt_kommuner_parti_procenter.csv", index=False, sep=";")
+
+    national_totals = get_nationale_partier(kube.stemmer["land"], resultater_21_partier, geo, refdata)
+    ændrede_filer.skriv_csv(national_totals, national_dir / "nationalt_partier.csv", index=False, sep=";")
+
+    summary_df = pd.DataFrame({
+        "Optalte valgsteder": [f"{fremdrift['optalte'].sum()} ud af {fremdrift['alle'].sum()}"],
+        geo.fundet_kolonne: [f"{alle} ud af {geo.antal}"]
+    })
+    ændrede_filer.skriv_csv(summary_df, national_dir / "status.csv", index=False)
+
+    # Gem listen over ændrede datafiler, så kun de berørte grafer publiceres
+    ændrede = ændrede_filer.gem()
+    print(f"{geo.valg}: {len(ændrede)} data files changed")
+    return ændrede
+
+def opdater_alle(geografier=(KOMMUNER, REGIONER), refdata=None) -> dict[str, list[str]]:
+    """Update KV and RV in one go, sharing the reference-data indexes. Returns {valg: pending changed files}."""
+    refdata = load_refdata() if refdata is None else refdata
+    return {geo.valg: opdater(geo, refdata) for geo in geografier}
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import pickle
+
+# Bump når formatet på de cachede rækker ændrer sig, så gamle shards ikke genbruges
+CACHE_VERSION = 4
+
+class ParseCache:
+    """Per-file cache of flattened result columns, stored as one pickle shard per afstemningsområde.
+
+    Each file is identified by its key in the hash index (e.g. "valgresultater/x.json")
+    and a fingerprint (sidecar hash, or size and mtime). A shard is only reused when
+    the fingerprint matches, so only new or changed files have to be parsed again.
+    Shards that have been read or written are also kept in memory, so a long-running
+    process (valgnat.py) does not read them from disk again on the next run.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.index_path = os.path.join(cache_dir, "index.json")
+        self.index = {}
+        self.rows = {}
+        self.seen = set()
+        self.hits, self.misses = 0, 0
+
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, encoding="utf-8") as f:
+                    index = json.load(f)
+                if index.get("version") == CACHE_VERSION:
+                    self.index = index["files"]
+            except Exception as e:
+                print(f"Could not read parse cache index {self.index_path}, starting over: {e}")
+
+    def get(self, key, fingerprint):
+        """Return the cached columns for a file, or None if the file has changed."""
+        self.seen.add(key)
+        entry = self.index.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            self.misses += 1
+            return None
+        if key in self.rows:
+            self.hits += 1
+            return self.rows[key]
+        try:
+            with open(os.path.join(self.cache_dir, entry["shard"]), "rb") as f:
+                rows = pickle.load(f)
+        except Exception:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.rows[key] = rows
+        return rows
+
+    def peek(self, key, fingerprint):
+        """Like get(), but a shard read from disk is not kept in memory (for streaming over all files)."""
+        entry = self.index.get(key)
+        if entry is None or entry["fingerprint"] != fingerprint:
+            return None
+        if key in self.rows:
+            return self.rows[key]
+        try:
+            with open(os.path.join(self.cache_dir, entry["shard"]), "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def put(self, key, fingerprint, shard_id, rows):
+        self.seen.add(key)
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # afstemningsområde-id'et er ikke unikt på tværs af filer (fx gamle testfiler), så tilføj en hash af nøglen
+        shard = f"{shard_id}_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:8]}.pkl"
+        tmp_path = os.path.join(self.cache_dir, shard + ".tmp")
+        with open(tmp_path, "wb") as f:
+            pickle.dump(rows, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, os.path.join(self.cache_dir, shard))
+        self.index[key] = {"fingerprint": fingerprint, "shard": shard}
+        self.rows[key] = rows
+
+    def save(self):
+        """Write the index and remove shards for files that no longer exist."""
+        for key in [key for key in self.index if key not in self.seen]:
+            self.rows.pop(key, None)
+            shard_path = os.path.join(self.cache_dir, self.index.pop(key)["shard"])
+            if os.path.exists(shard_path):
+                os.remove(shard_path)
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = self.index_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": CACHE_VERSION, "files": self.index}, f, ensure_ascii=False)
+        os.replace(tmp_path, self.index_path)
+        print(f"Parse cache: {self.hits} files reused, {self.misses} parsed")
+        self.seen = set()
+        self.hits, self.misses = 0, 0
+
+_caches = {}
+
+def open_cache(cache_dir):
+    """Return the ParseCache for cache_dir, reusing the one already open in this process."""
+    if cache_dir not in _caches:
+        _caches[cache_dir] = ParseCache(cache_dir)
+    return _caches[cache_dir]
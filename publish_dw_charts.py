@@ -1,32 +1,16 @@
-import requests
-import json
-import os
-from dotenv import load_dotenv
-
-DW_TOKEN = ""
-
-if DW_TOKEN is None:
-    raise ValueError("DW_TOKEN not found in .env file")
-
-dw_charts = json.load(open("dw_charts.json", "r", encoding="utf-8"))
-
-
-print("Publishing charts...")
-
-for chart in dw_charts.values():
-    for values in chart.values():
-        if isinstance(values, dict) and "id" in values:
-            print(f"Publishing chart with id {values['id']}")
-            chart_id = values['id']
-
-
-            url = f"https://api.datawrapper.de/v3/charts/{chart_id}/publish"
-
-            payload = { "callWebhooks": True }
-            headers = {
-                "Authorization": f"Bearer {DW_TOKEN}",
-                "accept": "*/*",
-                "content-type": "application/json"
-            }
-
-            response = requests.post(url, json=payload, headers=headers)
\ No newline at end of file
+import argparse
+
+from dw_client import DatawrapperClient
+from kvrv.publish import dw_token, load_dw_charts, load_urls, publish_all, publish_changed
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Publicer Datawrapper-graferne")
+    parser.add_argument("--alle", action="store_true", help="publicer alle grafer i dw_charts.json, ikke kun dem med ændrede data")
+    args = parser.parse_args()
+
+    print("Publishing charts...")
+    with DatawrapperClient(dw_token()) as client:
+        if args.alle:
+            publish_all(client, load_dw_charts())
+        else:
+            publish_changed(client, load_dw_charts(), load_urls())
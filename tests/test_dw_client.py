@@ -0,0 +1,67 @@
+from urllib.parse import urlparse
+
+from dw_client import DatawrapperClient
+
+class Svar:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self.data = data
+        self.text = str(data)
+        self.headers = {}
+
+    def json(self):
+        return self.data
+
+class FalskDatawrapper:
+    """Just enough of the charts API: list with folderId and search, create and patch."""
+
+    def __init__(self):
+        self.charts = {}
+
+    def request(self, method, url, timeout=None, params=None, json=None):
+        path = urlparse(url).path
+        if method == "GET" and path == "/charts":
+            # Ligesom API'et: search matcher en del af titlen, og typen er ikke et filter
+            return Svar(200, {"list": [
+                chart for chart in self.charts.values()
+                if str(chart["folderId"]) == str(params["folderId"]) and params["search"] in chart["title"]
+            ]})
+        if method == "POST" and path == "/charts":
+            chart = {**json, "id": f"c{len(self.charts) + 1}"}
+            self.charts[chart["id"]] = chart
+            return Svar(201, chart)
+        if method == "PATCH":
+            chart = self.charts[path.rsplit("/", 1)[1]]
+            chart.update(json)
+            return Svar(200, chart)
+        return Svar(404)
+
+def klient():
+    client = DatawrapperClient("token", base_url="http://dw.test", rate=1000, burst=1000)
+    server = FalskDatawrapper()
+    client.session.request = server.request
+    return client, server
+
+def payload(chart_type, folder_id="355509"):
+    return {"title": "Sådan stemte Fanø Kommune", "type": chart_type, "folderId": folder_id}
+
+def test_tabel_og_søjlediagram_med_samme_titel():
+    client, server = klient()
+    tabel = client.create_chart(payload("tables"))
+    søjler = client.create_chart(payload("column-chart"))
+    assert tabel["id"] != søjler["id"]
+
+    # En ny kørsel opdaterer hver sin graf og ændrer ikke typen på den anden
+    assert client.create_chart(payload("tables"))["id"] == tabel["id"]
+    assert client.create_chart(payload("column-chart"))["id"] == søjler["id"]
+    assert {chart["id"]: chart["type"] for chart in server.charts.values()} == {tabel["id"]: "tables", søjler["id"]: "column-chart"}
+
+def test_samme_titel_i_en_anden_mappe():
+    client, server = klient()
+    første = client.create_chart(payload("tables", "355509"))
+    anden = client.create_chart(payload("tables", "355517"))
+    assert første["id"] != anden["id"]
+    assert client.find_chart("Sådan stemte Fanø Kommune", 355517, "tables") == anden["id"]
+    assert client.find_chart("Sådan stemte Fanø", "355517") is None
+    assert len(server.charts) == 2
@@ -0,0 +1,36 @@
+import pytest
+
+import valg_json
+from hash_index import is_valid_json
+
+# Backends, der er installeret her. json (standardbiblioteket) er der altid
+BACKENDS = [navn for navn, modul in (("msgspec", valg_json.msgspec), ("orjson", valg_json.orjson), ("json", valg_json.json)) if modul]
+
+GYLDIG = '{"Kommune": "Fanø Kommune", "Kommunekode": 563, "Kandidatlister": [{"Stemmer": 12, "Navn": null}]}'.encode()
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_is_valid_json(monkeypatch, backend):
+    monkeypatch.setattr(valg_json, "BACKEND", backend)
+    assert is_valid_json(GYLDIG)
+    assert valg_json.loads(GYLDIG)["Kandidatlister"] == [{"Stemmer": 12, "Navn": None}]
+    # en halv fil, som når en download bliver afbrudt
+    for n in (0, 1, len(GYLDIG) // 2, len(GYLDIG) - 1):
+        assert not is_valid_json(GYLDIG[:n])
+
+def test_msgspec_uden_orjson(monkeypatch):
+    # Sådan ser workflowene ud: msgspec er installeret, orjson ikke
+    if valg_json.msgspec is None:
+        pytest.skip("msgspec is not installed")
+    monkeypatch.setattr(valg_json, "orjson", None)
+    monkeypatch.setattr(valg_json, "BACKEND", valg_json._vælg_backend())
+    assert valg_json.BACKEND == "msgspec"
+    assert is_valid_json(GYLDIG)
+    assert not is_valid_json(GYLDIG[:-1])
+
+def test_tvunget_backend_der_ikke_er_installeret(monkeypatch):
+    monkeypatch.setattr(valg_json, "orjson", None)
+    with pytest.raises(ImportError, match="orjson is not installed"):
+        valg_json._vælg_backend("orjson")
+    with pytest.raises(ImportError, match="not a json backend"):
+        valg_json._vælg_backend("yaml")
+    assert valg_json._vælg_backend("json") == "json"
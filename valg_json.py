@@ -0,0 +1,230 @@
+import json
+import os
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dekoder til json-filerne fra valg.dk. Med msgspec dekodes filerne direkte til typede Structs ud fra
+# skemaerne nedenfor (felter vi ikke bruger springes over), med orjson eller stdlib json parses hele filen
+# og valideres bagefter mod de samme skemaer. I alle tilfælde får man en dict med netop skemaets felter,
+# og en fil der ikke passer til skemaet giver en SchemaFejl i stedet for stille None-kolonner.
+# Backend kan tvinges med KVRV_JSON_BACKEND=msgspec|orjson|json.
+
+def _vælg_backend(ønsket=None):
+    """The json backend to use: the forced one if it is installed, otherwise the fastest installed one."""
+    installeret = {"msgspec": msgspec, "orjson": orjson, "json": json}
+    if not ønsket:
+        return "msgspec" if msgspec else "orjson" if orjson else "json"
+    if ønsket not in installeret:
+        raise ImportError(f"KVRV_JSON_BACKEND={ønsket!r} is not a json backend, use msgspec, orjson or json")
+    if installeret[ønsket] is None:
+        raise ImportError(f"KVRV_JSON_BACKEND={ønsket!r}, but {ønsket} is not installed")
+    return ønsket
+
+BACKEND = _vælg_backend(os.environ.get("KVRV_JSON_BACKEND"))
+
+def _decode(raw):
+    # Uden skema parses filen med backendens egen dekoder. Alle tre giver en ValueError ved ugyldig json
+    if BACKEND == "msgspec":
+        return msgspec.json.decode(raw)
+    if BACKEND == "orjson":
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+class SchemaFejl(ValueError):
+    """A valg.dk payload does not match the expected schema."""
+
+
+class Valgfri:
+    """Schema marker for a field that may be missing or null."""
+
+    def __init__(self, type, default=None):
+        self.type = type
+        self.default = default
+
+
+# Skemaerne beskriver kun de felter, vi faktisk bruger. Et dict er et json-objekt, [x] er en liste af x
+VALGRESULTAT = {
+    "Kommune": str,
+    "Kommunekode": int,
+    "Afstemningsområde": str,
+    "AfstemningsområdeDagiId": int,
+    "FrigivelsesTidspunktUTC": str,
+    "GodkendelsesDatoUTC": Valgfri(str),
+    "Resultatart": str,
+    "GyldigeStemmer": int,
+    "AfgivneStemmer": int,
+    "Kandidatlister": Valgfri([{
+        "KandidatlisteId": str,
+        "Navn": str,
+        "Bogstavbetegnelse": str,
+        "Stemmer": int,
+        "Listestemmer": int,
+        "StemmerDifferenceFraForrigeValg": Valgfri(int, 0),
+        "Kandidater": Valgfri([{
+            "Id": str,
+            "Stemmeseddelnavn": str,
+            "Stemmer": int,
+        }]),
+    }], []),
+}
+
+MANDATFORDELING = {
+    "Valgart": str,
+    "FrigivelsesTidspunktUTC": str,
+    "Resultatart": str,
+    "Kommune": Valgfri(str),
+    "Kommunekode": Valgfri(int),
+    "Region": Valgfri(str),
+    "RegionDagiId": Valgfri(str),
+    "PersonligeMandater": Valgfri([{
+        "Nummer": int,
+        "KandidatId": str,
+        "Stemmeseddelnavn": str,
+        "KandidatlisteId": str,
+        "KandidatlisteNavn": str,
+        "Bogstavbetegnelse": str,
+    }], []),
+    "ListeMandater": Valgfri([{
+        "Nummer": int,
+        "KandidatlisteId": str,
+        "KandidatlisteNavn": str,
+        "Bogstavbetegnelse": str,
+    }], []),
+}
+
+KANDIDAT_DATA = {
+    "Kommune": Valgfri(str),
+    "KommuneDagiId": Valgfri(str),
+    "Region": Valgfri(str),
+    "RegionDagiId": Valgfri(str),
+    "FrigivelsesTidspunktUTC": str,
+    "OpdateringsTidspunktUTC": str,
+    "Valgforbund": Valgfri([{
+        "Navn": str,
+        "KandidatlisteId": [str],
+    }], []),
+    "Kandidatlister": [{
+        "KandidatlisteId": str,
+        "Stemmeseddelsplacering": int,
+        "Bogstavbetegnelse": str,
+        "Navn": str,
+        "Opstillingsform": str,
+        "Kandidater": [{
+            "Id": str,
+            "Navn": str,
+            "Stemmeseddelnavn": str,
+            "Stilling": Valgfri(str),
+            "BopaelPaaStemmeseddel": Valgfri(str),
+        }],
+    }],
+}
+
+
+def _msgspec_type(spec, navn):
+    if isinstance(spec, dict):
+        felter = []
+        for key, feltspec in spec.items():
+            if isinstance(feltspec, Valgfri):
+                felter.append((key, _msgspec_type(feltspec.type, navn + "_" + key) | None, feltspec.default))
+            else:
+                felter.append((key, _msgspec_type(feltspec, navn + "_" + key)))
+        return msgspec.defstruct(navn, felter, kw_only=True, forbid_unknown_fields=False)
+    if isinstance(spec, list):
+        return list[_msgspec_type(spec[0], navn)]
+    return spec
+
+_decoders = {}
+
+def _decoder(schema):
+    if id(schema) not in _decoders:
+        _decoders[id(schema)] = msgspec.json.Decoder(_msgspec_type(schema, "Payload"))
+    return _decoders[id(schema)]
+
+
+class _Afvigelse(Exception):
+    """Raised by _valider; the path is built up on the way out, so the happy path stays cheap."""
+
+    def __init__(self, besked):
+        self.besked = besked
+        self.sti = []
+
+
+def _valider(obj, spec):
+    """Check obj against spec and return a copy with only the schema's fields."""
+    if isinstance(spec, dict):
+        if type(obj) is not dict:
+            raise _Afvigelse(f"Expected `object`, got `{type(obj).__name__}`")
+        resultat = {}
+        for key, feltspec in spec.items():
+            if key not in obj:
+                if not isinstance(feltspec, Valgfri):
+                    raise _Afvigelse(f"Object missing required field `{key}`")
+                resultat[key] = feltspec.default
+                continue
+            value = obj[key]
+            if isinstance(feltspec, Valgfri):
+                if value is None:
+                    resultat[key] = None
+                    continue
+                feltspec = feltspec.type
+            try:
+                resultat[key] = _valider(value, feltspec)
+            except _Afvigelse as e:
+                e.sti.append(f".{key}")
+                raise
+        return resultat
+    if isinstance(spec, list):
+        if type(obj) is not list:
+            raise _Afvigelse(f"Expected `array`, got `{type(obj).__name__}`")
+        element = spec[0]
+        if not isinstance(element, (dict, list)):
+            for i, value in enumerate(obj):
+                if type(value) is not element:
+                    e = _Afvigelse(f"Expected `{element.__name__}`, got `{type(value).__name__}`")
+                    e.sti.append(f"[{i}]")
+                    raise e
+            return obj
+        resultat = []
+        for i, value in enumerate(obj):
+            try:
+                resultat.append(_valider(value, element))
+            except _Afvigelse as e:
+                e.sti.append(f"[{i}]")
+                raise
+        return resultat
+    if type(obj) is not spec:
+        raise _Afvigelse(f"Expected `{spec.__name__}`, got `{type(obj).__name__}`")
+    return obj
+
+
+def loads(raw, schema=None):
+    """Decode a json document, validated against schema if one is given."""
+    if schema is not None and BACKEND == "msgspec":
+        try:
+            return msgspec.to_builtins(_decoder(schema).decode(raw))
+        except msgspec.ValidationError as e:
+            raise SchemaFejl(str(e)) from e
+    data = _decode(raw)
+    if schema is None:
+        return data
+    try:
+        return _valider(data, schema)
+    except _Afvigelse as e:
+        raise SchemaFejl(f"{e.besked} - at `${''.join(reversed(e.sti))}`") from None
+
+def load_file(path, schema=None):
+    with open(path, "rb") as f:
+        raw = f.read()
+    try:
+        return loads(raw, schema)
+    except SchemaFejl as e:
+        raise SchemaFejl(f"{path}: {e}") from e
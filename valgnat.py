@@ -0,0 +1,163 @@
+import argparse
+import signal
+import subprocess
+import threading
+import time
+import traceback
+from datetime import datetime, timezone
+
+from config import VALGNAT_INTERVAL, VALGNAT_OPDATER
+from kvrv.fetch import hent, HentFejl
+from kvrv.structure import strukturer_resultater, strukturer_mandater
+from kvrv.update import opdater_alle
+from kvrv.publish import dw_token, load_dw_charts, load_urls, publish_changed
+from dw_client import DatawrapperClient
+
+# Valgnat: én proces, der kører hele kæden hent -> strukturer -> opdater -> (push) -> publicer igen og igen,
+# i stedet for at hvert workflow starter sin egen python, installerer pakker og læser alt forfra.
+# Funktionerne fra kvrv kaldes direkte, så pandas, indekset over kommuner.json/partier.json (kvrv/refdata.py) og
+# parse-cachen (med de parsede rækker) bliver i hukommelsen mellem kørslerne. Hvert trin er inkrementelt: kun
+# ændrede filer hentes og parses, kun ændrede datafiler skrives, og kun de berørte grafer publiceres.
+#
+#     python valgnat.py --push --publish
+#
+# Ctrl-C / SIGTERM stopper efter det igangværende trin (et signal mere stopper med det samme).
+stop = threading.Event()
+
+def _stop(signum, frame):
+    if stop.is_set():
+        raise KeyboardInterrupt
+    print(f"Got {signal.Signals(signum).name}, stopping after the current stage (send it again to stop now)")
+    stop.set()
+
+def log(besked):
+    print(f"[valgnat {datetime.now():%H:%M:%S}] {besked}", flush=True)
+
+# Kør ét trin og log, hvor lang tid det tog. En fejl logges, og resten af runden springes over
+def kør_trin(navn, fn, *args):
+    start = time.perf_counter()
+    try:
+        result = fn(*args)
+    except (Exception, SystemExit):
+        log(f"{navn} failed after {time.perf_counter() - start:.1f}s:\n{traceback.format_exc()}")
+        raise
+    log(f"{navn}: {time.perf_counter() - start:.1f}s")
+    return result
+
+def strukturer(workers):
+    strukturer_resultater("kv", workers=workers)
+    strukturer_resultater("rv", workers=workers)
+    strukturer_mandater()
+
+# Commit og push datafilerne som workflowene gjorde, så Datawrapper kan hente de nye csv'er, før graferne publiceres
+# Tilstandsfilerne (manifest, hash-indeks, behandlede_*.json osv.) står i .gitignore, så kun datafilerne kommer med
+def commit_data():
+    subprocess.run(["git", "add", "data/"], check=True)
+    if subprocess.run(["git", "diff", "--cached", "--quiet"]).returncode != 0:
+        timestamp = datetime.now(timezone.utc).strftime("%a %b %d %H:%M:%S UTC %Y")
+        subprocess.run(["git", "commit", "-q", "-m", f"Latest data: {timestamp}"], check=True)
+
+def push():
+    commit_data()
+
+    # Commits fra en runde, hvor push fejlede, kommer også med her
+    subprocess.run(["git", "fetch", "-q", "origin", "main"], check=True)
+    ahead = subprocess.run(["git", "rev-list", "--count", "FETCH_HEAD..HEAD"], capture_output=True, text=True, check=True)
+    if int(ahead.stdout) == 0:
+        print("No data changes to push.")
+        return
+
+    # Ved konflikter vinder vores nye datafiler (-X theirs er de commits, der rebases). Konflikter, som -X ikke
+    # løser (fx en fil, der er slettet på main), afbryder rebasen, så checkoutet ikke bliver hængende midt i en
+    # rebase. Vores datafiler committes så i stedet igen oven på origin/main
+    try:
+        subprocess.run(["git", "rebase", "-q", "-X", "theirs", "FETCH_HEAD"], check=True)
+    except subprocess.CalledProcessError:
+        subprocess.run(["git", "rebase", "--abort"])
+        log("Rebase onto origin/main failed and was aborted, committing the data files again on top of it")
+        subprocess.run(["git", "reset", "-q", "FETCH_HEAD"], check=True)
+        commit_data()
+    subprocess.run(["git", "push", "-q", "origin", "HEAD:main"], check=True)
+
+class Valgnat:
+    """State kept between ticks: whether there is fetched data left to structure and update."""
+
+    def __init__(self, args):
+        self.args = args
+        self.venter = True # ved opstart kan der ligge data fra en tidligere kørsel, som ikke er behandlet
+        self.sidst_opdateret = float("-inf")
+        if args.publish:
+            self.client = DatawrapperClient(dw_token())
+            self.dw_charts = load_dw_charts()
+
+    def tick(self):
+        start = time.perf_counter()
+        trin = [] if self.args.ingen_hent else [("fetch", self.hent)]
+        trin += [("structure", self.strukturer), ("update", self.opdater)]
+        if self.args.push:
+            trin.append(("push", push))
+        if self.args.publish:
+            trin.append(("publish", self.publish))
+
+        for navn, fn in trin:
+            if stop.is_set():
+                log(f"Stopped before {navn}")
+                return
+            try:
+                kør_trin(navn, fn)
+            except (Exception, SystemExit):
+                return
+        log(f"tick done in {time.perf_counter() - start:.1f}s")
+
+    def hent(self):
+        try:
+            hentet = hent()
+        except HentFejl as e:
+            # De filer, der blev hentet, behandles i denne runde. Resten hentes igen i næste
+            log(f"fetch: {e}")
+            hentet = e.hentet
+        if hentet:
+            self.venter = True
+
+    def strukturer(self):
+        if self.venter:
+            strukturer(self.args.workers)
+
+    def opdater(self):
+        # 05a/05b læser også borgmester- og regionsarkene, så de køres med jævne mellemrum, selv uden nye valgdata
+        if not self.venter and time.monotonic() - self.sidst_opdateret < VALGNAT_OPDATER:
+            print("No new data, skipping update.")
+            return
+        opdater_alle()
+        self.venter = False
+        self.sidst_opdateret = time.monotonic()
+
+    def publish(self):
+        # URL-arket læses hver gang, så nye grafer kommer med
+        publish_changed(self.client, self.dw_charts, load_urls())
+
+def main():
+    parser = argparse.ArgumentParser(description="Kør valgnatten: hent, strukturer, opdater og publicer i én proces")
+    parser.add_argument("--interval", type=float, default=VALGNAT_INTERVAL, help="sekunder mellem hver runde")
+    parser.add_argument("--workers", type=int, default=1, help="antal processer til at parse json-filerne")
+    parser.add_argument("--push", action="store_true", help="commit og push datafilerne efter hver opdatering")
+    parser.add_argument("--publish", action="store_true", help="publicer de grafer, hvis data er ændret")
+    parser.add_argument("--ingen-hent", action="store_true", help="spring SFTP-hentningen over (kør på de lokale filer)")
+    parser.add_argument("--once", action="store_true", help="kør kun én runde")
+    args = parser.parse_args()
+
+    signal.signal(signal.SIGINT, _stop)
+    signal.signal(signal.SIGTERM, _stop)
+
+    valgnat = Valgnat(args)
+    log(f"Started, polling every {args.interval:g}s")
+    while not stop.is_set():
+        start = time.monotonic()
+        valgnat.tick()
+        if args.once:
+            break
+        stop.wait(max(0.0, args.interval - (time.monotonic() - start)))
+    log("Stopped")
+
+if __name__ == "__main__":
+    main()